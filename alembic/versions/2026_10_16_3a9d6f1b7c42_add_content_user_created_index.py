@@ -0,0 +1,40 @@
+"""add_content_user_created_index
+
+Revision ID: 3a9d6f1b7c42
+Revises: 8c3f41d7e2b9
+Create Date: 2026-10-16 14:27:05.611930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9d6f1b7c42'
+down_revision: Union[str, None] = '8c3f41d7e2b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_content_user_created',
+            'content_sessions',
+            ['user_id', sa.text('created_at DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_content_user_created',
+            table_name='content_sessions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
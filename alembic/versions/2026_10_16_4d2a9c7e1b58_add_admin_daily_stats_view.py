@@ -0,0 +1,102 @@
+"""add_admin_daily_stats_view
+
+Revision ID: 4d2a9c7e1b58
+Revises: a31f1aee9c17
+Create Date: 2026-10-16 21:07:52.184306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d2a9c7e1b58'
+down_revision: Union[str, None] = 'a31f1aee9c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS admin_daily_stats AS
+        WITH bounds AS (
+            SELECT
+                date_trunc('day', now() AT TIME ZONE 'utc') AS today,
+                date_trunc('month', now() AT TIME ZONE 'utc') AS month_start,
+                (now() AT TIME ZONE 'utc') - interval '30 days' AS thirty_days_ago
+        ),
+        user_stats AS (
+            SELECT
+                count(*) FILTER (WHERE u.is_active) AS total_users,
+                count(*) FILTER (
+                    WHERE u.is_active AND u.last_login >= b.today
+                ) AS active_today
+            FROM users u, bounds b
+        ),
+        today_content AS (
+            SELECT
+                count(*) AS attempts,
+                count(*) FILTER (WHERE cs.status = 'COMPLETED') AS completed,
+                count(*) FILTER (WHERE cs.status = 'FAILED') AS failed
+            FROM content_sessions cs, bounds b
+            WHERE cs.created_at >= b.today
+        ),
+        monthly_rev AS (
+            SELECT coalesce(sum(ct.cost_usd), 0) AS revenue
+            FROM credit_transactions ct, bounds b
+            WHERE ct.transaction_type = 'PURCHASE'
+                AND ct.status = 'completed'
+                AND ct.created_at >= b.month_start
+        ),
+        content_types AS (
+            SELECT cs.content_type, count(*) AS count
+            FROM content_sessions cs, bounds b
+            WHERE cs.status = 'COMPLETED' AND cs.created_at >= b.thirty_days_ago
+            GROUP BY cs.content_type
+            ORDER BY count(*) DESC
+            LIMIT 5
+        ),
+        growth AS (
+            SELECT date(u.created_at) AS date, count(*) AS count
+            FROM users u, bounds b
+            WHERE u.created_at >= b.thirty_days_ago
+            GROUP BY date(u.created_at)
+        )
+        SELECT
+            1 AS id,
+            us.total_users,
+            us.active_today,
+            tc.attempts,
+            tc.completed,
+            tc.failed,
+            mr.revenue,
+            (
+                SELECT json_agg(
+                    json_build_object('content_type', content_type, 'count', count)
+                    ORDER BY count DESC
+                )
+                FROM content_types
+            ) AS top_content_types,
+            (
+                SELECT json_agg(
+                    json_build_object('date', date, 'new_users', count) ORDER BY date
+                )
+                FROM growth
+            ) AS user_growth,
+            now() AS refreshed_at
+        FROM user_stats us, today_content tc, monthly_rev mr
+        """
+    )
+    # Required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_admin_daily_stats_id ON admin_daily_stats (id)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP MATERIALIZED VIEW IF EXISTS admin_daily_stats')
@@ -0,0 +1,53 @@
+"""add_admin_filter_indexes
+
+Revision ID: 5b7e2c91a4d3
+Revises: 2d005eaae830
+Create Date: 2026-10-16 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c91a4d3'
+down_revision: Union[str, None] = '2d005eaae830'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_content_status_created',
+            'content_sessions',
+            ['status', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_transaction_type_status_created',
+            'credit_transactions',
+            ['transaction_type', 'status', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_transaction_type_status_created',
+            table_name='credit_transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'idx_content_status_created',
+            table_name='content_sessions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,54 @@
+"""add_transaction_user_type_status_index
+
+Revision ID: 7e4b2d9a1f63
+Revises: 3a9d6f1b7c42
+Create Date: 2026-10-16 16:03:52.204718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e4b2d9a1f63'
+down_revision: Union[str, None] = '3a9d6f1b7c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_transaction_user_type_status',
+            'credit_transactions',
+            ['user_id', 'transaction_type', 'status'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Superseded by the index above (same leading columns)
+        op.drop_index(
+            'idx_transaction_user_type',
+            table_name='credit_transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_transaction_user_type',
+            'credit_transactions',
+            ['user_id', 'transaction_type'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'idx_transaction_user_type_status',
+            table_name='credit_transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,75 @@
+"""add_active_children_count
+
+Revision ID: 8c3f41d7e2b9
+Revises: 5b7e2c91a4d3
+Create Date: 2026-10-16 14:03:27.551920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3f41d7e2b9'
+down_revision: Union[str, None] = '5b7e2c91a4d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column(
+            'active_children_count',
+            sa.Integer(),
+            server_default='0',
+            nullable=False,
+        ),
+    )
+
+    # Block writes to children until the trigger exists, so the backfill and
+    # the trigger see the same rows; the lock lasts until the migration commits
+    op.execute("LOCK TABLE children IN SHARE ROW EXCLUSIVE MODE")
+
+    # Backfill from existing rows
+    op.execute(
+        """
+        UPDATE users SET active_children_count = (
+            SELECT count(*) FROM children
+            WHERE children.user_id = users.id AND children.is_active
+        )
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION update_active_children_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_active THEN
+                UPDATE users SET active_children_count = active_children_count - 1
+                WHERE id = OLD.user_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_active THEN
+                UPDATE users SET active_children_count = active_children_count + 1
+                WHERE id = NEW.user_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_children_active_count
+        AFTER INSERT OR DELETE OR UPDATE OF is_active, user_id ON children
+        FOR EACH ROW EXECUTE FUNCTION update_active_children_count()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_children_active_count ON children")
+    op.execute("DROP FUNCTION IF EXISTS update_active_children_count()")
+    op.drop_column('users', 'active_children_count')
@@ -0,0 +1,82 @@
+"""add_user_status_created_indexes
+
+Revision ID: a31f1aee9c17
+Revises: 7e4b2d9a1f63
+Create Date: 2026-10-16 18:12:40.318527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a31f1aee9c17'
+down_revision: Union[str, None] = '7e4b2d9a1f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_content_user_status_created',
+            'content_sessions',
+            ['user_id', 'status', sa.text('created_at DESC')],
+            postgresql_include=['topic', 'content_type'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Superseded by the index above (same leading columns)
+        op.drop_index(
+            'idx_content_user_status',
+            table_name='content_sessions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            'idx_transaction_user_type_created',
+            'credit_transactions',
+            ['user_id', 'transaction_type', 'created_at'],
+            postgresql_include=['amount'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_transaction_user_created',
+            'credit_transactions',
+            ['user_id', sa.text('created_at DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_transaction_user_created',
+            table_name='credit_transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'idx_transaction_user_type_created',
+            table_name='credit_transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            'idx_content_user_status',
+            'content_sessions',
+            ['user_id', 'status'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'idx_content_user_status_created',
+            table_name='content_sessions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -3,27 +3,65 @@ Kiddos - Authentication & Security
 Database token authentication, password hashing, and encryption
 """
 
+import os
+import time
 import secrets
 import hashlib
-from datetime import datetime, timedelta
-from typing import Optional, Tuple, Dict, Any
+import json
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import datetime
+from typing import Optional, Tuple, Dict, Any, List
 from passlib.context import CryptContext
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import base64
+import calendar
 import logging
+import zstandard
 
-from .database import get_db, redis_manager
+from .database import get_db, get_async_db, redis_manager
 from .models import User, UserSession
 from .config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: Argon2id at OWASP parameters (m=46 MiB, t=1, p=1). bcrypt
+# stays verifiable and is marked deprecated, so its hashes upgrade on login.
+# Parallelism across logins comes from HASH_POOL, not per-hash lanes.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=47104,
+    argon2__time_cost=1,
+    argon2__parallelism=1,
+    argon2__digest_size=32,
+    argon2__salt_size=16,
+)
+
+# Dedicated threads for password hashing; Argon2 releases the GIL, so hashes
+# run in parallel and never stall the event loop
+HASH_POOL = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="password-hash"
+)
+
+
+async def run_in_hash_pool(func, *args, **kwargs):
+    """Run a password-hashing call on the hash pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(HASH_POOL, partial(func, *args, **kwargs))
+
 
 # HTTP Bearer token extractor
 security = HTTPBearer(auto_error=False)
@@ -43,6 +81,17 @@ class AuthenticationError(HTTPException):
 
 
 # Field encryption for PII
+# New values are AES-256-GCM blobs: version byte + 12-byte nonce + ciphertext
+# and tag. AESGCM_ZSTD_VERSION marks a zstd-compressed plaintext (large JSON
+# such as generated content). Legacy Fernet tokens (base64 text, never starting
+# with either byte) are still decrypted, so existing rows stay readable.
+AESGCM_VERSION = b"\x01"
+AESGCM_ZSTD_VERSION = b"\x02"
+AESGCM_VERSIONS = (AESGCM_VERSION, AESGCM_ZSTD_VERSION)
+AESGCM_NONCE_SIZE = 12
+ZSTD_LEVEL = 3
+
+
 class FieldEncryption:
     """Handle field-level encryption for PII data"""
 
@@ -54,29 +103,64 @@ class FieldEncryption:
             if len(decoded_key) != 32:
                 raise ValueError("Invalid Fernet key length")
             self.fernet = Fernet(key)  # Use the original base64-encoded key
+            # Separate AES-GCM key derived from the same secret
+            self.aesgcm = AESGCM(
+                HKDF(
+                    algorithm=hashes.SHA256(),
+                    length=32,
+                    salt=None,
+                    info=b"kiddos-field-encryption-aesgcm",
+                ).derive(decoded_key)
+            )
         except Exception as e:
             logger.critical(f"Invalid encryption key: {e}")
             raise RuntimeError("Encryption key configuration error") from e
 
-    def encrypt(self, data: str) -> bytes:
-        """Encrypt string data"""
+    def encrypt(self, data: str, compress: bool = False) -> bytes:
+        """Encrypt string data, optionally zstd-compressing it first"""
         if not data:
             return b""
         if isinstance(data, str):
             data = data.encode("utf-8")
-        return self.fernet.encrypt(data)
+        version = AESGCM_VERSION
+        if compress:
+            data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+            version = AESGCM_ZSTD_VERSION
+        nonce = os.urandom(AESGCM_NONCE_SIZE)
+        return version + nonce + self.aesgcm.encrypt(nonce, data, None)
 
     def decrypt(self, encrypted_data: bytes) -> str:
         """Decrypt bytes data"""
+        return self.decrypt_bytes(encrypted_data).decode("utf-8")
+
+    def decrypt_bytes(self, encrypted_data: bytes) -> bytes:
+        """Decrypt to raw UTF-8 bytes, skipping the str round-trip"""
         if not encrypted_data:
-            return ""
+            return b""
         try:
             if isinstance(encrypted_data, str):
                 encrypted_data = encrypted_data.encode("utf-8")
-            return self.fernet.decrypt(encrypted_data).decode("utf-8")
+            version = encrypted_data[:1]
+            if version in AESGCM_VERSIONS:
+                nonce = encrypted_data[1 : 1 + AESGCM_NONCE_SIZE]
+                ciphertext = encrypted_data[1 + AESGCM_NONCE_SIZE :]
+                data = self.aesgcm.decrypt(nonce, ciphertext, None)
+                if version == AESGCM_ZSTD_VERSION:
+                    data = zstandard.ZstdDecompressor().decompress(data)
+                return data
+            return self.fernet.decrypt(encrypted_data)
         except Exception as e:
             logger.error(f"Decryption failed: {e}")
-            return ""
+            return b""
+
+    def decrypt_many(self, encrypted_items: List[Optional[bytes]]) -> List[str]:
+        """Decrypt a batch of values with the shared cipher instances"""
+        decrypt = self.decrypt
+        return [decrypt(item) for item in encrypted_items]
+
+    def is_legacy(self, encrypted_data: bytes) -> bool:
+        """Whether a value is still a Fernet token"""
+        return bool(encrypted_data) and encrypted_data[:1] not in AESGCM_VERSIONS
 
     def hash_for_lookup(self, data: str) -> bytes:
         """Create hash for database lookups (email indexing)"""
@@ -94,7 +178,7 @@ class AuthService:
         self.pwd_context = pwd_context
         self.field_encryption = field_encryption
 
-    def create_user(
+    async def create_user(
         self,
         email: str,
         password: str,
@@ -116,11 +200,14 @@ class AuthService:
                     "Email already registered", status.HTTP_400_BAD_REQUEST
                 )
 
+            # Only the hash goes to the pool; the session stays on this thread
+            password_hash = await run_in_hash_pool(self.pwd_context.hash, password)
+
             # Create user
             user = User(
                 email_encrypted=field_encryption.encrypt(email),
                 email_hash=email_hash,
-                password_hash=self.pwd_context.hash(password),
+                password_hash=password_hash,
                 first_name_encrypted=field_encryption.encrypt(first_name)
                 if first_name
                 else None,
@@ -146,7 +233,7 @@ class AuthService:
             db.rollback()
             raise AuthenticationError("Failed to create user account")
 
-    def authenticate_user(
+    async def authenticate_user(
         self, email: str, password: str, db: Session
     ) -> Optional[User]:
         """Authenticate user credentials"""
@@ -154,9 +241,22 @@ class AuthService:
             email_hash = field_encryption.hash_for_lookup(email)
             user = db.query(User).filter(User.email_hash == email_hash).first()
 
-            if not user or not self.pwd_context.verify(password, user.password_hash):
+            if not user:
+                # Spend the same Argon2 time as a real check so unknown
+                # emails can't be told apart by response latency
+                await run_in_hash_pool(self.pwd_context.dummy_verify)
                 return None
 
+            # verify_and_update also hands back a new hash when the stored
+            # one uses outdated settings, so users migrate on login
+            valid, new_hash = await run_in_hash_pool(
+                self.pwd_context.verify_and_update, password, user.password_hash
+            )
+            if not valid:
+                return None
+            if new_hash:
+                user.password_hash = new_hash
+
             # Update last login
             user.last_login = datetime.utcnow()
             db.commit()
@@ -174,39 +274,37 @@ class AuthService:
         user_agent: Optional[str] = None,
         remember_me: bool = False,
         db: Session = None,
-    ) -> Tuple[str, datetime]:
-        """Create session token"""
+    ) -> Tuple[str, int]:
+        """Create session token, returning (token, expiry as epoch seconds)"""
         try:
             # Calculate expiry
-            if remember_me:
-                expires_at = datetime.utcnow() + timedelta(
-                    days=settings.SESSION_EXPIRE_DAYS * 2
-                )
-            else:
-                expires_at = datetime.utcnow() + timedelta(
-                    days=settings.SESSION_EXPIRE_DAYS
-                )
+            expire_days = settings.SESSION_EXPIRE_DAYS * (2 if remember_me else 1)
+            expires_at_epoch = int(time.time()) + expire_days * 86400
 
             # Create session
             session = UserSession(
                 user_id=user_id,
                 ip_address=ip_address,
                 user_agent=user_agent,
-                expires_at=expires_at,
+                expires_at=datetime.utcfromtimestamp(expires_at_epoch),
             )
+            # Read before commit, which would expire the instance and reload it
+            token = session.token
 
             db.add(session)
             db.commit()
 
-            return session.token, expires_at
+            return token, expires_at_epoch
 
         except Exception as e:
             logger.error(f"Session creation failed: {e}")
             db.rollback()
             raise AuthenticationError("Failed to create session")
 
-    def verify_session_token(self, token: str, db: Session) -> Optional[User]:
-        """Verify session token and return user"""
+    def verify_session(
+        self, token: str, db: Session
+    ) -> Optional[Tuple[User, datetime]]:
+        """Verify session token and return (user, session expiry)"""
         try:
             session = (
                 db.query(UserSession)
@@ -223,12 +321,50 @@ class AuthService:
 
             # Get user
             user = db.query(User).filter(User.id == session.user_id).first()
-            return user if user and user.is_active else None
+            if not user or not user.is_active:
+                return None
+            return user, session.expires_at
 
         except Exception as e:
             logger.error(f"Token verification failed: {e}")
             return None
 
+    async def verify_session_async(
+        self, token: str, db: AsyncSession
+    ) -> Optional[Tuple[User, datetime]]:
+        """Verify session token on an AsyncSession and return (user, session expiry)"""
+        try:
+            session = (
+                await db.execute(
+                    select(UserSession).where(
+                        UserSession.token == token, UserSession.is_active == True
+                    )
+                )
+            ).scalars().first()
+
+            if not session or session.is_expired():
+                return None
+
+            # Update last used
+            session.last_used = datetime.utcnow()
+            await db.commit()
+
+            # Get user
+            user = await db.get(User, session.user_id)
+            if not user or not user.is_active:
+                return None
+            return user, session.expires_at
+
+        except Exception as e:
+            logger.error(f"Token verification failed: {e}")
+            await db.rollback()
+            return None
+
+    def verify_session_token(self, token: str, db: Session) -> Optional[User]:
+        """Verify session token and return user"""
+        result = self.verify_session(token, db)
+        return result[0] if result else None
+
     def revoke_session(self, token: str, db: Session) -> bool:
         """Revoke session token"""
         try:
@@ -242,19 +378,28 @@ class AuthService:
             logger.error(f"Session revocation failed: {e}")
             return False
 
-    def revoke_all_user_sessions(self, user_id: str, db: Session) -> int:
-        """Revoke all user sessions"""
+    def revoke_all_user_sessions(self, user_id: str, db: Session) -> list:
+        """Revoke all user sessions, returning the revoked tokens"""
         try:
-            count = (
-                db.query(UserSession)
-                .filter(UserSession.user_id == user_id, UserSession.is_active == True)
-                .update({"is_active": False})
+            tokens = (
+                db.execute(
+                    update(UserSession)
+                    .where(
+                        UserSession.user_id == user_id, UserSession.is_active == True
+                    )
+                    .values(is_active=False)
+                    .returning(UserSession.token)
+                    .execution_options(synchronize_session=False)
+                )
+                .scalars()
+                .all()
             )
             db.commit()
-            return count
+            return tokens
         except Exception as e:
             logger.error(f"Session revocation failed: {e}")
-            return 0
+            db.rollback()
+            return []
 
     def get_user_sessions(self, user_id: str, db: Session) -> list:
         """Get user's active sessions"""
@@ -285,8 +430,109 @@ class AuthService:
 auth_service = AuthService()
 
 
+class SessionCache:
+    """Redis cache-aside for session token -> user lookups"""
+
+    PREFIX = "auth:sess:"
+    REVOKED_PREFIX = "auth:revoked:"
+
+    def __init__(self):
+        self.redis = redis_manager
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        """Cache key material; raw tokens never reach Redis"""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    async def lookup(
+        self, token_hash: str
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Get (cached session payload, revoked flag) in one round-trip"""
+        try:
+            cached, revoked = await self.redis.client.mget(
+                f"{self.PREFIX}{token_hash}", f"{self.REVOKED_PREFIX}{token_hash}"
+            )
+        except Exception as e:
+            logger.error(f"Session cache lookup failed: {e}")
+            return None, False
+
+        if revoked:
+            return None, True
+        if not cached:
+            return None, False
+        try:
+            return json.loads(cached), False
+        except ValueError:
+            return None, False
+
+    async def set(self, token_hash: str, payload: Dict[str, Any], ttl: int) -> None:
+        """Cache session payload for ttl seconds"""
+        if ttl > 0:
+            await self.redis.set_with_expiry(
+                f"{self.PREFIX}{token_hash}", json.dumps(payload), ttl
+            )
+
+    async def revoke(self, token_hash: str, ttl: int) -> bool:
+        """Drop the cached session and blacklist the token for ttl seconds"""
+        try:
+            pipe = self.redis.client.pipeline(transaction=False)
+            pipe.unlink(f"{self.PREFIX}{token_hash}")
+            pipe.setex(f"{self.REVOKED_PREFIX}{token_hash}", ttl, 1)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Session revocation in cache failed: {e}")
+            return False
+
+    async def delete(self, *token_hashes: str) -> None:
+        """Invalidate cached sessions"""
+        if not token_hashes:
+            return
+        try:
+            pipe = self.redis.client.pipeline(transaction=False)
+            for token_hash in token_hashes:
+                pipe.unlink(f"{self.PREFIX}{token_hash}")
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Session cache invalidation failed: {e}")
+
+
+# Global session cache
+session_cache = SessionCache()
+
+
 # Dependency functions
+async def _lookup_cached_session(
+    request: Request, token: str
+) -> Tuple[str, Optional[Dict[str, Any]], bool]:
+    """Record the token on the request and check the session cache"""
+    # Handlers that need the raw token and its expiry (logout) read them from
+    # here; the expiry is unknown for cache entries written before it was stored
+    request.state.auth_token = token
+    request.state.auth_expires_at = None
+    token_hash = session_cache.hash_token(token)
+
+    cached, revoked = await session_cache.lookup(token_hash)
+    if cached:
+        request.state.auth_expires_at = cached.get("expires_at")
+    return token_hash, cached, revoked
+
+
+async def _cache_verified_session(
+    request: Request, token_hash: str, user: User, expires_at: datetime
+) -> None:
+    """Cache a session verified against the database"""
+    # Session expiries are stored as naive UTC
+    expires_at_epoch = calendar.timegm(expires_at.utctimetuple())
+    request.state.auth_expires_at = expires_at_epoch
+    ttl = min(expires_at_epoch - int(time.time()), settings.SESSION_CACHE_TTL)
+    await session_cache.set(
+        token_hash, {"user_id": str(user.id), "expires_at": expires_at_epoch}, ttl
+    )
+
+
 async def get_current_user(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db),
 ) -> Optional[User]:
@@ -294,7 +540,23 @@ async def get_current_user(
     if not credentials or not credentials.credentials:
         return None
 
-    user = auth_service.verify_session_token(credentials.credentials, db)
+    token = credentials.credentials
+    token_hash, cached, revoked = await _lookup_cached_session(request, token)
+
+    # Cache hit skips the session lookup; the user row is still loaded so
+    # deactivation takes effect immediately
+    if revoked:
+        return None
+    if cached:
+        user = db.get(User, uuid.UUID(cached["user_id"]))
+        return user if user and user.is_active else None
+
+    result = auth_service.verify_session(token, db)
+    if not result:
+        return None
+
+    user, expires_at = result
+    await _cache_verified_session(request, token_hash, user, expires_at)
     return user
 
 
@@ -311,6 +573,40 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_user_async(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> Optional[User]:
+    """Get current user from token through the request's AsyncSession"""
+    if not credentials or not credentials.credentials:
+        return None
+
+    token = credentials.credentials
+    token_hash, cached, revoked = await _lookup_cached_session(request, token)
+
+    if revoked:
+        return None
+    if cached:
+        user = await db.get(User, uuid.UUID(cached["user_id"]))
+        return user if user and user.is_active else None
+
+    result = await auth_service.verify_session_async(token, db)
+    if not result:
+        return None
+
+    user, expires_at = result
+    await _cache_verified_session(request, token_hash, user, expires_at)
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: Optional[User] = Depends(get_current_user_async),
+) -> User:
+    """Get current active user (required) for routers on AsyncSession"""
+    return await get_current_active_user(current_user)
+
+
 def get_client_info(request: Request) -> Tuple[Optional[str], Optional[str]]:
     """Extract client IP and user agent"""
     try:
@@ -333,9 +629,13 @@ def get_client_info(request: Request) -> Tuple[Optional[str], Optional[str]]:
 # Export main components
 __all__ = [
     "auth_service",
+    "session_cache",
     "field_encryption",
     "AuthenticationError",
     "get_current_user",
     "get_current_active_user",
+    "get_current_user_async",
+    "get_current_active_user_async",
     "get_client_info",
+    "run_in_hash_pool",
 ]
@@ -31,15 +31,21 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ENCRYPTION_KEY: str
     SESSION_EXPIRE_DAYS: int = 30
+    SESSION_CACHE_TTL: int = 300  # Seconds a validated token is cached in Redis
 
     # Database - Environment variable required
     DATABASE_URL: str
     DATABASE_POOL_SIZE: int = 20
-    DATABASE_MAX_OVERFLOW: int = 30
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: int = 30
+    DATABASE_POOL_RECYCLE: int = 1800
 
     # Redis - Environment variable with safe default
     REDIS_URL: str = "redis://localhost:6379"
     REDIS_MAX_CONNECTIONS: int = 20
+    REDIS_POOL_SIZE: int = 100  # Async pool shared by request handlers
+    REDIS_POOL_TIMEOUT: int = 5  # Seconds to wait for a free pooled connection
+    REDIS_PUBSUB_POOL_SIZE: int = 50  # Subscriptions, one per open /events stream
 
     # Claude AI - Environment variable required, no defaults
     CLAUDE_API_KEY: str
@@ -74,6 +80,9 @@ class Settings(BaseSettings):
     BASIC_TIER_CONTENT_PER_DAY: int = 50
     FAMILY_TIER_CONTENT_PER_HOUR: int = 20
     FAMILY_TIER_CONTENT_PER_DAY: int = 150
+    # Comma-separated tiers that keep the exact (ZSET) sliding window;
+    # every other tier uses the cheaper fixed-window counter
+    RATE_LIMIT_SLIDING_WINDOW_TIERS: str = ""
 
     # Enhanced Content Settings
     ENHANCED_CONTENT_ENABLED: bool = True
@@ -197,6 +206,15 @@ class Settings(BaseSettings):
         """Convert CORS origins string to list"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
+    @property
+    def rate_limit_sliding_window_tiers_list(self) -> list:
+        """Convert sliding-window tiers string to list"""
+        return [
+            tier.strip()
+            for tier in self.RATE_LIMIT_SLIDING_WINDOW_TIERS.split(",")
+            if tier.strip()
+        ]
+
     @property
     def allowed_audio_formats_list(self) -> list:
         """Convert audio formats string to list"""
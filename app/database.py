@@ -3,11 +3,13 @@ Kiddos - Database Configuration and Session Management (FIXED)
 """
 
 import redis
-from sqlalchemy import create_engine, MetaData
+import redis.asyncio as aioredis
+from sqlalchemy import create_engine, MetaData, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 import logging
 from contextlib import contextmanager
 
@@ -22,13 +24,29 @@ engine = create_engine(
     poolclass=QueuePool,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
     pool_pre_ping=True,  # Validates connections before use
-    pool_recycle=3600,  # Recycle connections every hour
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,  # Stay under Postgres idle timeouts
     echo=settings.is_development,  # Log SQL in development
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers that should not block the event loop
+async_engine = create_async_engine(
+    settings.database_url_async,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,
+    echo=settings.is_development,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 # Base class for all models
 Base = declarative_base()
 
@@ -52,20 +70,42 @@ redis_pool = redis.ConnectionPool.from_url(
 
 redis_client = redis.Redis(connection_pool=redis_pool)
 
+# Async Redis for request handlers; the blocking pool makes callers wait for a
+# free connection instead of failing when all of them are checked out
+async_redis_pool = aioredis.BlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_POOL_SIZE,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    decode_responses=True,
+)
+
+async_redis_client = aioredis.Redis(connection_pool=async_redis_pool)
+
+# Subscriptions hold their connection for the whole stream, so they get their
+# own pool and can never starve the one above
+async_redis_pubsub_pool = aioredis.ConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_PUBSUB_POOL_SIZE,
+    decode_responses=True,
+)
+
+async_redis_pubsub_client = aioredis.Redis(connection_pool=async_redis_pubsub_pool)
+
 
 class DatabaseManager:
     """Database connection and health management"""
 
     def __init__(self):
         self.engine = engine
-        self.redis_client = redis_client
+        self.redis_client = async_redis_client
 
     async def check_database_health(self) -> bool:
         """Check if database is healthy"""
         try:
-            with self.get_db() as db:
-                db.execute("SELECT 1")
-                return True
+            # Async engine so the probe never blocks the event loop
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return True
         except Exception as e:
             logger.error(f"Database health check failed: {e}")
             return False
@@ -73,7 +113,7 @@ class DatabaseManager:
     async def check_redis_health(self) -> bool:
         """Check if Redis is healthy"""
         try:
-            self.redis_client.ping()
+            await self.redis_client.ping()
             return True
         except Exception as e:
             logger.error(f"Redis health check failed: {e}")
@@ -114,6 +154,20 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get an async database session
+    Used with FastAPI Depends()
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Database transaction failed: {e}")
+            raise
+
+
 def get_redis() -> redis.Redis:
     """
     Get Redis client instance
@@ -125,12 +179,12 @@ class RedisManager:
     """Redis operations manager - FIXED"""
 
     def __init__(self):
-        self.client = redis_client
+        self.client = async_redis_client
 
     async def set_with_expiry(self, key: str, value: str, expiry_seconds: int) -> bool:
         """Set key with expiration"""
         try:
-            return self.client.setex(key, expiry_seconds, value)
+            return await self.client.setex(key, expiry_seconds, value)
         except Exception as e:
             logger.error(f"Redis set failed for key {key}: {e}")
             return False
@@ -138,7 +192,7 @@ class RedisManager:
     async def get(self, key: str) -> Optional[str]:
         """Get value by key"""
         try:
-            return self.client.get(key)
+            return await self.client.get(key)
         except Exception as e:
             logger.error(f"Redis get failed for key {key}: {e}")
             return None
@@ -146,15 +200,37 @@ class RedisManager:
     async def delete(self, key: str) -> bool:
         """Delete key"""
         try:
-            return bool(self.client.delete(key))
+            return bool(await self.client.delete(key))
         except Exception as e:
             logger.error(f"Redis delete failed for key {key}: {e}")
             return False
 
+    async def hget_cached(self, key: str, field: str) -> Optional[str]:
+        """Get one field of a cache hash"""
+        try:
+            return await self.client.hget(key, field)
+        except Exception as e:
+            logger.error(f"Redis hget failed for key {key}: {e}")
+            return None
+
+    async def hset_cached(
+        self, key: str, field: str, value, expiry_seconds: int
+    ) -> bool:
+        """Set one field of a cache hash and restart the hash's expiry"""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(key, field, value)
+            pipe.expire(key, expiry_seconds)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis hset failed for key {key}: {e}")
+            return False
+
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
         try:
-            return bool(self.client.exists(key))
+            return bool(await self.client.exists(key))
         except Exception as e:
             logger.error(f"Redis exists check failed for key {key}: {e}")
             return False
@@ -162,7 +238,7 @@ class RedisManager:
     async def increment(self, key: str, amount: int = 1) -> Optional[int]:
         """Increment counter"""
         try:
-            return self.client.incrby(key, amount)
+            return await self.client.incrby(key, amount)
         except Exception as e:
             logger.error(f"Redis increment failed for key {key}: {e}")
             return None
@@ -170,7 +246,7 @@ class RedisManager:
     async def zadd(self, key: str, mapping: dict) -> int:
         """Add to sorted set"""
         try:
-            return self.client.zadd(key, mapping)
+            return await self.client.zadd(key, mapping)
         except Exception as e:
             logger.error(f"Redis zadd failed for key {key}: {e}")
             return 0
@@ -178,7 +254,7 @@ class RedisManager:
     async def zcard(self, key: str) -> int:
         """Get sorted set cardinality"""
         try:
-            return self.client.zcard(key)
+            return await self.client.zcard(key)
         except Exception as e:
             logger.error(f"Redis zcard failed for key {key}: {e}")
             return 0
@@ -188,7 +264,7 @@ class RedisManager:
     ) -> int:
         """Remove range from sorted set by score"""
         try:
-            return self.client.zremrangebyscore(key, min_score, max_score)
+            return await self.client.zremrangebyscore(key, min_score, max_score)
         except Exception as e:
             logger.error(f"Redis zremrangebyscore failed for key {key}: {e}")
             return 0
@@ -196,7 +272,7 @@ class RedisManager:
     async def expire(self, key: str, seconds: int) -> bool:
         """Set key expiration"""
         try:
-            return self.client.expire(key, seconds)
+            return await self.client.expire(key, seconds)
         except Exception as e:
             logger.error(f"Redis expire failed for key {key}: {e}")
             return False
@@ -5,6 +5,7 @@ Clean architecture with separated routers
 
 import logging
 import time
+import anyio.to_thread
 from contextlib import asynccontextmanager
 from datetime import datetime
 from fastapi import FastAPI, Request
@@ -12,7 +13,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from .config import settings
-from .database import init_database
+from .database import (
+    init_database,
+    async_engine,
+    async_redis_pool,
+    async_redis_pubsub_pool,
+)
 from .claude_service import claude_service
 from .auth import AuthenticationError
 from .routers import (
@@ -27,6 +33,7 @@ from .routers import (
     images_router,
     fixed_content_router,
 )
+from .routers.images import proxy_client
 
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
@@ -43,6 +50,12 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Kiddos application...")
 
     try:
+        # Size the threadpool for sync handlers to the sync DB pool
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = (
+            settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW
+        )
+
         # Initialize database
         init_database()
         logger.info("Database initialized successfully")
@@ -62,6 +75,10 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down Kiddos application...")
+    await proxy_client.aclose()
+    await async_redis_pool.disconnect()
+    await async_redis_pubsub_pool.disconnect()
+    await async_engine.dispose()
 
 
 # Create FastAPI application
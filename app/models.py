@@ -4,6 +4,7 @@ All SQLAlchemy models for the application - Fixed PostgreSQL constraints and for
 """
 
 import uuid
+from typing import Optional
 from datetime import datetime, timedelta
 from sqlalchemy import (
     Column,
@@ -19,8 +20,11 @@ from sqlalchemy import (
     Index,
     CheckConstraint,
     UniqueConstraint,
+    DDL,
+    event,
 )
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
@@ -86,6 +90,9 @@ class User(Base):
     # Account settings
     tier = Column(SQLEnum(UserTier), default=UserTier.FREE, nullable=False)
     credits = Column(Integer, default=10, nullable=False)
+    active_children_count = Column(
+        Integer, default=0, server_default="0", nullable=False
+    )  # Maintained by the children trigger below
     preferred_language = Column(String(2), default="ar", nullable=False)
     timezone = Column(String(50), default="Asia/Dubai", nullable=False)
 
@@ -236,9 +243,12 @@ class Child(Base):
         Index("idx_child_last_used", "last_used"),
     )
 
-    def get_effective_language(self) -> str:
+    def get_effective_language(self, parent_language: Optional[str] = None) -> str:
         """Get language preference (child's or parent's)"""
-        return self.preferred_language or self.parent.preferred_language
+        if self.preferred_language:
+            return self.preferred_language
+        # Use the caller's already-loaded parent language to avoid a lazy load
+        return parent_language or self.parent.preferred_language
 
     def to_dict(self) -> dict:
         """Convert to dictionary for API responses"""
@@ -255,6 +265,39 @@ class Child(Base):
         }
 
 
+# Keep users.active_children_count in step with children.is_active so the
+# child limit check needs no COUNT query. Used by create_all; migration
+# 8c3f41d7e2b9 carries its own frozen copy for existing databases.
+ACTIVE_CHILDREN_COUNT_FUNCTION = """
+CREATE OR REPLACE FUNCTION update_active_children_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_active THEN
+        UPDATE users SET active_children_count = active_children_count - 1
+        WHERE id = OLD.user_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_active THEN
+        UPDATE users SET active_children_count = active_children_count + 1
+        WHERE id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+ACTIVE_CHILDREN_COUNT_TRIGGER = """
+CREATE TRIGGER trg_children_active_count
+AFTER INSERT OR DELETE OR UPDATE OF is_active, user_id ON children
+FOR EACH ROW EXECUTE FUNCTION update_active_children_count()
+"""
+
+for _statement in (ACTIVE_CHILDREN_COUNT_FUNCTION, ACTIVE_CHILDREN_COUNT_TRIGGER):
+    event.listen(
+        Child.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
+
+
 class UserSession(Base):
     """User authentication sessions (database tokens)"""
 
@@ -334,7 +377,9 @@ class ContentSession(Base):
     # Generated content (encrypted)
     generated_content = Column(LargeBinary, nullable=True)  # Not Text!
     generated_title = Column(String(200), nullable=True)
-    content_metadata = Column(JSON, default=dict, nullable=False)
+    content_metadata = Column(
+        MutableDict.as_mutable(JSON), default=dict, nullable=False
+    )
 
     # Credits and cost
     credits_cost = Column(Integer, nullable=False)
@@ -366,7 +411,15 @@ class ContentSession(Base):
         CheckConstraint(
             "language IN ('ar', 'en', 'fr', 'de')", name="check_content_language"
         ),
-        Index("idx_content_user_status", "user_id", "status"),
+        Index(
+            "idx_content_user_status_created",
+            user_id,
+            status,
+            created_at.desc(),
+            postgresql_include=["topic", "content_type"],
+        ),
+        Index("idx_content_user_created", user_id, created_at.desc()),
+        Index("idx_content_status_created", "status", "created_at"),
         Index("idx_content_expires", "expires_at"),
         Index("idx_content_type_age", "content_type", "age_group"),
     )
@@ -481,7 +534,23 @@ class CreditTransaction(Base):
             "(transaction_type = 'EXPIRY' AND amount < 0)",
             name="check_transaction_type_amount",
         ),
-        Index("idx_transaction_user_type", "user_id", "transaction_type"),
+        Index(
+            "idx_transaction_user_type_status", "user_id", "transaction_type", "status"
+        ),
+        Index(
+            "idx_transaction_user_type_created",
+            "user_id",
+            "transaction_type",
+            "created_at",
+            postgresql_include=["amount"],
+        ),
+        Index("idx_transaction_user_created", user_id, created_at.desc()),
+        Index(
+            "idx_transaction_type_status_created",
+            "transaction_type",
+            "status",
+            "created_at",
+        ),
         Index("idx_transaction_stripe", "stripe_payment_id"),
         Index("idx_transaction_created", "created_at"),
     )
@@ -698,3 +767,90 @@ def get_content_expiry() -> datetime:
 # Child -> ContentSessions (1:N)
 # ContentSession -> CreditTransaction (1:1)
 # ContentSession -> ContentModeration (1:1)
+
+
+# One-row rollup behind GET /admin/stats, refreshed every minute by the
+# refresh_admin_daily_stats task (the unique index allows REFRESH ... CONCURRENTLY).
+# create_all runs on every startup, so both statements are idempotent;
+# migration 4d2a9c7e1b58 carries its own frozen copy.
+ADMIN_DAILY_STATS_VIEW = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS admin_daily_stats AS
+WITH bounds AS (
+    SELECT
+        date_trunc('day', now() AT TIME ZONE 'utc') AS today,
+        date_trunc('month', now() AT TIME ZONE 'utc') AS month_start,
+        (now() AT TIME ZONE 'utc') - interval '30 days' AS thirty_days_ago
+),
+user_stats AS (
+    SELECT
+        count(*) FILTER (WHERE u.is_active) AS total_users,
+        count(*) FILTER (
+            WHERE u.is_active AND u.last_login >= b.today
+        ) AS active_today
+    FROM users u, bounds b
+),
+today_content AS (
+    SELECT
+        count(*) AS attempts,
+        count(*) FILTER (WHERE cs.status = 'COMPLETED') AS completed,
+        count(*) FILTER (WHERE cs.status = 'FAILED') AS failed
+    FROM content_sessions cs, bounds b
+    WHERE cs.created_at >= b.today
+),
+monthly_rev AS (
+    SELECT coalesce(sum(ct.cost_usd), 0) AS revenue
+    FROM credit_transactions ct, bounds b
+    WHERE ct.transaction_type = 'PURCHASE'
+        AND ct.status = 'completed'
+        AND ct.created_at >= b.month_start
+),
+content_types AS (
+    SELECT cs.content_type, count(*) AS count
+    FROM content_sessions cs, bounds b
+    WHERE cs.status = 'COMPLETED' AND cs.created_at >= b.thirty_days_ago
+    GROUP BY cs.content_type
+    ORDER BY count(*) DESC
+    LIMIT 5
+),
+growth AS (
+    SELECT date(u.created_at) AS date, count(*) AS count
+    FROM users u, bounds b
+    WHERE u.created_at >= b.thirty_days_ago
+    GROUP BY date(u.created_at)
+)
+SELECT
+    1 AS id,
+    us.total_users,
+    us.active_today,
+    tc.attempts,
+    tc.completed,
+    tc.failed,
+    mr.revenue,
+    (
+        SELECT json_agg(
+            json_build_object('content_type', content_type, 'count', count)
+            ORDER BY count DESC
+        )
+        FROM content_types
+    ) AS top_content_types,
+    (
+        SELECT json_agg(
+            json_build_object('date', date, 'new_users', count) ORDER BY date
+        )
+        FROM growth
+    ) AS user_growth,
+    now() AS refreshed_at
+FROM user_stats us, today_content tc, monthly_rev mr
+"""
+
+ADMIN_DAILY_STATS_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_admin_daily_stats_id ON admin_daily_stats (id)
+"""
+
+for _statement in (ADMIN_DAILY_STATS_VIEW, ADMIN_DAILY_STATS_INDEX):
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
+
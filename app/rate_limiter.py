@@ -1,10 +1,13 @@
 """
 Kiddos - Rate Limiting System (FIXED)
-Redis-based sliding window rate limiting with tier-based limits
+Redis-based fixed/sliding window rate limiting with tier-based limits
 """
 
 import time
 import asyncio
+import inspect
+from datetime import datetime
+from zoneinfo import ZoneInfo
 from typing import Optional, Tuple, Dict, Any
 from functools import wraps
 from fastapi import HTTPException, Request
@@ -12,11 +15,63 @@ import logging
 
 from .database import redis_manager
 from .config import RATE_LIMITS, settings
-from .models import UserTier
+from .models import User, UserTier
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+_UAE_TZ = ZoneInfo("Asia/Dubai")
+
+# Keyspace walk tuning: SCAN page-size hint and keys per UNLINK call
+SCAN_COUNT = 500
+UNLINK_BATCH_SIZE = 256
+
+# Keys per pipeline when summing a tier's usage for the debug overview
+OVERVIEW_BATCH_SIZE = 100
+
+# Token bucket for IP-keyed endpoints: refill, take one token, and report in a
+# single round-trip. Returns {allowed, tokens_left, retry_after_seconds}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    allowed = 1
+    tokens = tokens - 1
+else
+    retry_after = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, math.floor(tokens), retry_after}
+"""
+
+# Seconds a measured system load factor is reused before pinging Redis again
+LOAD_FACTOR_TTL = 2.0
+
+# Sliding window check in one round-trip. Returns {allowed, count, oldest_score};
+# the oldest score is only fetched when the request is rejected. The key TTL
+# outlives the window slightly so idle sets expire without a cleanup sweep.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= tonumber(ARGV[3]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, count, oldest[2] or false}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('EXPIRE', KEYS[1], window + 60)
+return {1, count + 1, false}
+"""
+
 
 class RateLimitExceeded(HTTPException):
     """Rate limit exceeded exception"""
@@ -37,11 +92,45 @@ class RateLimitExceeded(HTTPException):
 
 
 class RateLimiter:
-    """Redis-based sliding window rate limiter"""
+    """Redis-based rate limiter (fixed window, optional sliding window per tier)"""
 
     def __init__(self):
         self.redis = redis_manager
         self.limits = RATE_LIMITS
+        # Flattened (tier, limit_type) -> (max_requests, window_seconds)
+        self._cfg = {
+            (tier, limit_type): limit
+            for tier, tier_limits in RATE_LIMITS.items()
+            for limit_type, limit in tier_limits.items()
+        }
+        self.sliding_window_tiers = frozenset(
+            settings.rate_limit_sliding_window_tiers_list
+        )
+        self._sliding_window_script = self.redis.client.register_script(
+            SLIDING_WINDOW_SCRIPT
+        )
+        self._token_bucket_script = self.redis.client.register_script(
+            TOKEN_BUCKET_SCRIPT
+        )
+
+    @staticmethod
+    def sliding_window_key(tier: str, limit_type: str, identifier: str) -> str:
+        """Sorted-set key; the identifier is a cluster hash tag so all of one
+        client's keys share a slot"""
+        return f"rate_limit:{tier}:{limit_type}:{{{identifier}}}"
+
+    @classmethod
+    def _fixed_window_key(
+        cls,
+        tier: str,
+        limit_type: str,
+        identifier: str,
+        window_seconds: int,
+        now: float,
+    ) -> str:
+        """Counter key for the window bucket containing ``now``"""
+        bucket = int(now // window_seconds)
+        return f"{cls.sliding_window_key(tier, limit_type, identifier)}:{bucket}"
 
     async def check_rate_limit(
         self,
@@ -59,75 +148,283 @@ class RateLimiter:
         """
         try:
             # Get limit configuration
-            if limit_type in self.limits.get(tier, {}):
-                max_requests, window_seconds = self.limits[tier][limit_type]
+            cfg = self._cfg.get((tier, limit_type))
+            if cfg:
+                max_requests, window_seconds = cfg
             elif not (window_seconds and max_requests):
                 # No limit configured
                 return True, 999, 0
 
-            key = f"rate_limit:{tier}:{limit_type}:{identifier}"
             now = time.time()
 
-            # Remove old entries outside window
-            await self.redis.zremrangebyscore(key, 0, now - window_seconds)
-
-            # Count current requests in window
-            current_count = await self.redis.zcard(key)
+            if tier in self.sliding_window_tiers:
+                return await self._check_sliding_window(
+                    identifier, limit_type, tier, window_seconds, max_requests, now
+                )
 
-            # Check if limit exceeded
-            if current_count >= max_requests:
-                # Get oldest request to calculate retry_after
-                oldest_scores = await self._get_oldest_score(key)
-                if oldest_scores:
-                    oldest_time = oldest_scores[0][1]
-                    retry_after = int(oldest_time + window_seconds - now)
-                    retry_after = max(1, retry_after)  # At least 1 second
-                else:
-                    retry_after = window_seconds
+            # Fixed window: one counter per bucket, INCR + EXPIRE in one round-trip.
+            # NX keeps the TTL from being pushed back on every request.
+            key = self._fixed_window_key(
+                tier, limit_type, identifier, window_seconds, now
+            )
+            pipe = self.redis.client.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, window_seconds, nx=True)
+            current_count, _ = await pipe.execute()
 
+            if current_count > max_requests:
+                retry_after = max(1, int(window_seconds - (now % window_seconds)))
                 return False, 0, retry_after
 
-            # Add current request
-            await self.redis.zadd(key, {str(now): now})
-
-            # Set expiry to window duration
-            await self.redis.expire(key, window_seconds)
-
-            remaining = max_requests - current_count - 1
-            return True, remaining, 0
+            return True, max_requests - current_count, 0
 
         except Exception as e:
             logger.error(f"Rate limit check failed: {e}")
             # Fail open - allow request if Redis is down
             return True, 999, 0
 
-    async def _get_oldest_score(self, key: str):
-        """Get oldest score from sorted set"""
+    async def check_token_bucket(
+        self, identifier: str, limit_type: str, capacity: int, window_seconds: int
+    ) -> Tuple[bool, int, int]:
+        """
+        Token bucket holding ``capacity`` tokens, refilled evenly over
+        ``window_seconds``
+
+        Returns:
+            (allowed: bool, remaining: int, retry_after: int)
+        """
         try:
-            # Use the Redis client directly for range operations
-            result = self.redis.client.zrange(key, 0, 0, withscores=True)
-            return result
+            key = self.sliding_window_key("bucket", limit_type, identifier)
+            allowed, remaining, retry_after = await self._token_bucket_script(
+                keys=[key], args=[capacity, capacity / window_seconds, time.time()]
+            )
+            return bool(allowed), remaining, retry_after
+
         except Exception as e:
-            logger.error(f"Failed to get oldest score: {e}")
-            return []
+            logger.error(f"Token bucket check failed: {e}")
+            # Fail open - allow request if Redis is down
+            return True, 999, 0
+
+    async def _check_sliding_window(
+        self,
+        identifier: str,
+        limit_type: str,
+        tier: str,
+        window_seconds: int,
+        max_requests: int,
+        now: float,
+    ) -> Tuple[bool, int, int]:
+        """Exact sliding window check backed by a sorted set"""
+        key = self.sliding_window_key(tier, limit_type, identifier)
+
+        # Integer-string member: listpack stores it as a compact int64 and it
+        # stays readable through the decode_responses client
+        member = time.time_ns()
+        allowed, current_count, oldest_time = await self._sliding_window_script(
+            keys=[key], args=[now, window_seconds, max_requests, member]
+        )
+
+        if not allowed:
+            if oldest_time is not None:
+                retry_after = int(float(oldest_time) + window_seconds - now)
+                retry_after = max(1, retry_after)  # At least 1 second
+            else:
+                retry_after = window_seconds
+
+            return False, 0, retry_after
+
+        remaining = max_requests - current_count
+        return True, remaining, 0
+
+    def _queue_window_usage(
+        self,
+        pipe,
+        identifier: str,
+        limit_type: str,
+        tier: str,
+        window_seconds: int,
+        now: float,
+    ) -> None:
+        """Queue the commands needed to read usage for one limit type"""
+        if tier in self.sliding_window_tiers:
+            # Read-only: count and peek inside the window instead of trimming;
+            # the admit-path script is what prunes expired entries
+            key = self.sliding_window_key(tier, limit_type, identifier)
+            window_start = f"({now - window_seconds}"
+            pipe.zcount(key, window_start, "+inf")
+            pipe.zrange(
+                key,
+                window_start,
+                "+inf",
+                byscore=True,
+                offset=0,
+                num=1,
+                withscores=True,
+            )
+        else:
+            pipe.get(
+                self._fixed_window_key(
+                    tier, limit_type, identifier, window_seconds, now
+                )
+            )
+
+    def _window_usage_replies(self, tier: str) -> int:
+        """Number of pipeline replies _queue_window_usage queues"""
+        return 2 if tier in self.sliding_window_tiers else 1
+
+    def _read_window_usage(
+        self, results, tier: str, window_seconds: int, now: float
+    ) -> Tuple[int, Optional[float]]:
+        """Consume results queued by _queue_window_usage as (used, reset_at)"""
+        if tier in self.sliding_window_tiers:
+            current_count = next(results)
+            oldest_scores = next(results)
+            reset_time = None
+            if oldest_scores:
+                reset_time = oldest_scores[0][1] + window_seconds
+            return current_count, reset_time
+
+        current_count = int(next(results) or 0)
+        if not current_count:
+            return 0, None
+        return current_count, float((int(now // window_seconds) + 1) * window_seconds)
+
+    def usage_key(
+        self,
+        tier: str,
+        limit_type: str,
+        identifier: str,
+        window_seconds: int,
+        now: float,
+    ) -> str:
+        """Key ``limit_type`` is currently counted under for the tier's algorithm"""
+        if tier in self.sliding_window_tiers:
+            return self.sliding_window_key(tier, limit_type, identifier)
+        return self._fixed_window_key(
+            tier, limit_type, identifier, window_seconds, now
+        )
+
+    def queue_usage_debug(
+        self,
+        pipe,
+        identifier: str,
+        limit_type: str,
+        tier: str,
+        window_seconds: int,
+        now: float,
+        detail: bool = False,
+    ) -> None:
+        """Queue the commands parse_usage_debug reads for one limit type"""
+        self._queue_window_usage(
+            pipe, identifier, limit_type, tier, window_seconds, now
+        )
+        if tier not in self.sliding_window_tiers:
+            return
+        # Sliding tiers also report the raw set size and, when asked, the
+        # timestamps; fixed-window counters have nothing more to show
+        key = self.sliding_window_key(tier, limit_type, identifier)
+        pipe.zcard(key)
+        if detail:
+            pipe.zrange(
+                key,
+                f"({now - window_seconds}",
+                "+inf",
+                byscore=True,
+                withscores=True,
+            )
+
+    def parse_usage_debug(
+        self,
+        results,
+        identifier: str,
+        limit_type: str,
+        tier: str,
+        window_seconds: int,
+        now: float,
+        detail: bool = False,
+    ) -> Dict[str, Any]:
+        """Consume the replies queued by queue_usage_debug as a usage report
+
+        Replies from a ``raise_on_error=False`` pipeline that failed come back
+        as exception instances and turn the report into an error entry.
+        """
+        key = self.usage_key(tier, limit_type, identifier, window_seconds, now)
+        sliding = tier in self.sliding_window_tiers
+        usage_replies = self._window_usage_replies(tier)
+        extra_replies = (2 if detail else 1) if sliding else 0
+        replies = [next(results) for _ in range(usage_replies + extra_replies)]
+
+        error = next((r for r in replies if isinstance(r, Exception)), None)
+        if error:
+            return {"error": str(error), "redis_key": key}
+
+        valid_entries, reset_at = self._read_window_usage(
+            iter(replies), tier, window_seconds, now
+        )
+        extras = replies[usage_replies:]
+        usage = {
+            "redis_key": key,
+            "total_entries": extras[0] if sliding else valid_entries,
+            "valid_entries": valid_entries,
+            "reset_at": reset_at,
+        }
+        if detail:
+            entries = extras[1] if sliding else []
+            usage["entries_detail"] = [
+                {"timestamp": score, "age_seconds": now - score}
+                for _, score in entries
+            ]
+        return usage
+
+    async def get_tier_overview(self, tier: str) -> Dict[str, Dict[str, int]]:
+        """Key and entry counts per limit type across every client of a tier"""
+        # Sliding-window keys are sorted sets ending with the hash-tag brace;
+        # fixed-window buckets are counters with a ":<bucket>" suffix that
+        # expire with their window, so only live buckets are left to sum
+        client = self.redis.client
+        sliding = tier in self.sliding_window_tiers
+        pattern = f"rate_limit:{tier}:*}}" if sliding else f"rate_limit:{tier}:*}}:*"
+        keys = [key async for key in client.scan_iter(match=pattern, count=SCAN_COUNT)]
+
+        overview = {}
+        for i in range(0, len(keys), OVERVIEW_BATCH_SIZE):
+            batch = keys[i : i + OVERVIEW_BATCH_SIZE]
+            pipe = client.pipeline(transaction=False)
+            for key in batch:
+                if sliding:
+                    pipe.zcard(key)
+                else:
+                    pipe.get(key)
+            for key, entries in zip(batch, await pipe.execute()):
+                # A counter can expire between SCAN and GET
+                if entries is None:
+                    continue
+                limit_type = key.split(":")[2]
+                stats = overview.setdefault(limit_type, {"keys": 0, "entries": 0})
+                stats["keys"] += 1
+                stats["entries"] += int(entries)
+
+        return overview
 
     async def get_remaining_requests(
         self, identifier: str, limit_type: str, tier: str = "free"
     ) -> int:
         """Get remaining requests for identifier"""
         try:
-            if limit_type not in self.limits.get(tier, {}):
+            cfg = self._cfg.get((tier, limit_type))
+            if not cfg:
                 return 999
 
-            max_requests, window_seconds = self.limits[tier][limit_type]
-            key = f"rate_limit:{tier}:{limit_type}:{identifier}"
+            max_requests, window_seconds = cfg
             now = time.time()
 
-            # Clean old entries
-            await self.redis.zremrangebyscore(key, 0, now - window_seconds)
-
-            # Count current requests
-            current_count = await self.redis.zcard(key)
+            pipe = self.redis.client.pipeline(transaction=False)
+            self._queue_window_usage(
+                pipe, identifier, limit_type, tier, window_seconds, now
+            )
+            current_count, _ = self._read_window_usage(
+                iter(await pipe.execute()), tier, window_seconds, now
+            )
 
             return max(0, max_requests - current_count)
 
@@ -138,17 +435,30 @@ class RateLimiter:
     async def reset_limits(self, identifier: str, limit_type: str = None):
         """Reset rate limits for identifier"""
         try:
+            # The closing hash-tag brace bounds the identifier, so one trailing
+            # wildcard covers sliding-window keys and fixed-window buckets
             if limit_type:
                 # Reset specific limit type
-                pattern = f"rate_limit:*:{limit_type}:{identifier}"
+                pattern = f"rate_limit:*:{limit_type}:{{{identifier}}}*"
             else:
                 # Reset all limits for identifier
-                pattern = f"rate_limit:*:*:{identifier}"
+                pattern = f"rate_limit:*:*:{{{identifier}}}*"
+
+            client = self.redis.client
+            keys = [
+                key
+                async for key in client.scan_iter(match=pattern, count=SCAN_COUNT)
+            ]
 
-            # Use Redis client keys method directly
-            keys = list(self.redis.client.scan_iter(match=pattern))
+            # Every key shares the identifier's slot, so one pipeline unlinks them all
+            deleted = 0
             if keys:
-                await self.redis.client.delete(*keys)
+                pipe = client.pipeline(transaction=False)
+                for i in range(0, len(keys), UNLINK_BATCH_SIZE):
+                    pipe.unlink(*keys[i : i + UNLINK_BATCH_SIZE])
+                deleted = sum(await pipe.execute())
+
+            if deleted:
                 logger.info(
                     f"Reset rate limits for {identifier} ({limit_type or 'all'})"
                 )
@@ -162,25 +472,23 @@ class RateLimiter:
         """Get usage statistics for identifier"""
         try:
             stats = {}
+            tier_limits = list(self.limits[tier].items())
+            now = time.time()
 
-            for limit_type, (max_requests, window_seconds) in self.limits[tier].items():
-                key = f"rate_limit:{tier}:{limit_type}:{identifier}"
-                now = time.time()
-
-                # Clean old entries
-                await self.redis.zremrangebyscore(key, 0, now - window_seconds)
+            # Queue every limit type into one round-trip
+            pipe = self.redis.client.pipeline(transaction=False)
+            for limit_type, (_, window_seconds) in tier_limits:
+                self._queue_window_usage(
+                    pipe, identifier, limit_type, tier, window_seconds, now
+                )
+            results = iter(await pipe.execute())
 
-                # Get current usage
-                current_count = await self.redis.zcard(key)
+            for limit_type, (max_requests, window_seconds) in tier_limits:
+                current_count, reset_time = self._read_window_usage(
+                    results, tier, window_seconds, now
+                )
                 remaining = max(0, max_requests - current_count)
 
-                # Get oldest request for reset time
-                oldest_scores = await self._get_oldest_score(key)
-                reset_time = None
-                if oldest_scores:
-                    oldest_time = oldest_scores[0][1]
-                    reset_time = oldest_time + window_seconds
-
                 stats[limit_type] = {
                     "limit": max_requests,
                     "used": current_count,
@@ -201,39 +509,49 @@ rate_limiter = RateLimiter()
 
 
 # Decorator functions
+def _find_param(sig: inspect.Signature, annotation: type) -> Optional[str]:
+    """Name of the first parameter annotated with ``annotation`` (or a subclass)"""
+    for name, param in sig.parameters.items():
+        if isinstance(param.annotation, type) and issubclass(
+            param.annotation, annotation
+        ):
+            return name
+    return None
+
+
+def _bound_arguments(sig: inspect.Signature, args: tuple, kwargs: dict) -> dict:
+    """Arguments by name; FastAPI passes keywords, so binding is rarely needed"""
+    if not args:
+        return kwargs
+    return sig.bind_partial(*args, **kwargs).arguments
+
+
 def rate_limit(limit_type: str, tier_override: str = None):
     """
     Rate limiting decorator for FastAPI endpoints
 
     Usage:
         @rate_limit("content")
-        async def generate_content(current_user = Depends(get_current_user)):
+        async def generate_content(current_user: User = Depends(get_current_user)):
             pass
     """
 
     def decorator(func):
+        # Resolve which parameters carry the user and request once, up front
+        sig = inspect.signature(func)
+        user_param = _find_param(sig, User)
+        request_param = _find_param(sig, Request)
+        limit_header_by_tier = {
+            tier: str(tier_limits[limit_type][0])
+            for tier, tier_limits in RATE_LIMITS.items()
+            if limit_type in tier_limits
+        }
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Extract user from function arguments
-            current_user = None
-            request = None
-
-            # Look for user in kwargs (dependency injection)
-            for value in kwargs.values():
-                if hasattr(value, "id") and hasattr(value, "tier"):
-                    current_user = value
-                    break
-                elif hasattr(value, "client"):
-                    request = value
-
-            # Look for user in args
-            if not current_user:
-                for arg in args:
-                    if hasattr(arg, "id") and hasattr(arg, "tier"):
-                        current_user = arg
-                        break
-                    elif hasattr(arg, "client"):
-                        request = arg
+            params = _bound_arguments(sig, args, kwargs)
+            current_user = params.get(user_param)
+            request = params.get(request_param)
 
             # Determine identifier and tier
             if current_user:
@@ -259,8 +577,8 @@ def rate_limit(limit_type: str, tier_override: str = None):
             response = await func(*args, **kwargs)
 
             if hasattr(response, "headers"):
-                response.headers["X-RateLimit-Limit"] = str(
-                    RATE_LIMITS[tier][limit_type][0]
+                response.headers["X-RateLimit-Limit"] = limit_header_by_tier.get(
+                    tier, "0"
                 )
                 response.headers["X-RateLimit-Remaining"] = str(remaining)
                 response.headers["X-RateLimit-Type"] = limit_type
@@ -274,7 +592,7 @@ def rate_limit(limit_type: str, tier_override: str = None):
 
 def ip_rate_limit(limit_type: str, max_requests: int, window_seconds: int):
     """
-    IP-based rate limiting for unauthenticated endpoints
+    IP-based token bucket rate limiting for unauthenticated endpoints
 
     Usage:
         @ip_rate_limit("registration", 3, 86400)  # 3 per day
@@ -283,14 +601,13 @@ def ip_rate_limit(limit_type: str, max_requests: int, window_seconds: int):
     """
 
     def decorator(func):
+        sig = inspect.signature(func)
+        request_param = _find_param(sig, Request)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # Extract request object
-            request = None
-            for value in list(args) + list(kwargs.values()):
-                if hasattr(value, "client"):
-                    request = value
-                    break
+            request = _bound_arguments(sig, args, kwargs).get(request_param)
 
             if not request:
                 # Can't identify client, allow request
@@ -300,11 +617,11 @@ def ip_rate_limit(limit_type: str, max_requests: int, window_seconds: int):
             identifier = request.client.host
 
             # Check rate limit
-            allowed, remaining, retry_after = await rate_limiter.check_rate_limit(
+            allowed, remaining, retry_after = await rate_limiter.check_token_bucket(
                 identifier=identifier,
                 limit_type=limit_type,
+                capacity=max_requests,
                 window_seconds=window_seconds,
-                max_requests=max_requests,
             )
 
             if not allowed:
@@ -323,19 +640,16 @@ class AdaptiveRateLimiter:
     def __init__(self):
         self.base_limiter = rate_limiter
         self.load_factor = 1.0
-        self.peak_hours = list(range(18, 23))  # 6PM-11PM UAE time
+        self.peak_hours = frozenset(range(18, 23))  # 6PM-11PM UAE time
+        self._cached_factor = (0.0, 1.0)  # (expires_at monotonic, factor)
 
     async def adjust_for_peak_hours(
         self, tier: str, limit_type: str
     ) -> Tuple[int, int]:
         """Adjust limits during peak family hours"""
-        import pytz
-        from datetime import datetime
-
         try:
             # Get current hour in UAE timezone
-            uae_tz = pytz.timezone("Asia/Dubai")
-            current_hour = datetime.now(uae_tz).hour
+            current_hour = datetime.now(_UAE_TZ).hour
 
             base_limit, window = RATE_LIMITS[tier][limit_type]
 
@@ -357,54 +671,37 @@ class AdaptiveRateLimiter:
             return RATE_LIMITS[tier][limit_type]
 
     async def get_system_load_factor(self) -> float:
-        """Get current system load factor"""
+        """Get current system load factor (cached for LOAD_FACTOR_TTL seconds)"""
+        expires_at, factor = self._cached_factor
+        if time.monotonic() < expires_at:
+            return factor
+
         try:
             # Check Redis latency
-            start_time = time.time()
-            self.base_limiter.redis.client.ping()
-            redis_latency = time.time() - start_time
+            start_time = time.monotonic()
+            await self.base_limiter.redis.client.ping()
+            redis_latency = time.monotonic() - start_time
 
             # Adjust based on latency
             if redis_latency > 0.1:  # 100ms
-                return 0.5  # Reduce limits by 50%
+                factor = 0.5  # Reduce limits by 50%
             elif redis_latency > 0.05:  # 50ms
-                return 0.8  # Reduce limits by 20%
+                factor = 0.8  # Reduce limits by 20%
             else:
-                return 1.0  # Normal limits
+                factor = 1.0  # Normal limits
 
         except Exception as e:
             logger.error(f"Load factor check failed: {e}")
-            return 0.5  # Conservative fallback
+            factor = 0.5  # Conservative fallback
+
+        self._cached_factor = (time.monotonic() + LOAD_FACTOR_TTL, factor)
+        return factor
 
 
 # Global adaptive limiter
 adaptive_limiter = AdaptiveRateLimiter()
 
 
-# Background task for cleanup
-async def cleanup_expired_rate_limits():
-    """Background task to clean up expired rate limit entries"""
-    try:
-        pattern = "rate_limit:*"
-        keys = list(rate_limiter.redis.client.scan_iter(match=pattern))
-
-        cleaned_count = 0
-        for key in keys:
-            # Remove entries older than 24 hours
-            yesterday = time.time() - 86400
-            removed = await rate_limiter.redis.zremrangebyscore(key, 0, yesterday)
-            cleaned_count += removed
-
-            # Delete empty keys
-            if await rate_limiter.redis.zcard(key) == 0:
-                await rate_limiter.redis.delete(key)
-
-        logger.info(f"Cleaned up {cleaned_count} expired rate limit entries")
-
-    except Exception as e:
-        logger.error(f"Rate limit cleanup failed: {e}")
-
-
 # Utility functions
 async def get_user_rate_limits(user_id: str, tier: str) -> Dict[str, Any]:
     """Get current rate limit status for user"""
@@ -425,5 +722,4 @@ __all__ = [
     "RateLimitExceeded",
     "get_user_rate_limits",
     "reset_user_rate_limits",
-    "cleanup_expired_rate_limits",
 ]
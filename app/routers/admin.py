@@ -3,21 +3,23 @@ Kiddos - Admin Router
 Administrative functions, statistics, and management
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import List
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, text
 
 from ..database import get_db
 from ..schemas import AdminStats, UserManagement, SuccessResponse
-from ..auth import get_current_active_user
+from ..auth import get_current_active_user, field_encryption
 from ..models import (
     User,
     Child,
     ContentSession,
     ContentStatus,
+    ContentType,
     CreditTransaction,
     TransactionType,
     UserTier,
@@ -44,107 +46,54 @@ async def verify_admin_user(current_user: User = Depends(get_current_active_user
     return current_user
 
 
+def _approx_count(db: Session, model) -> int:
+    """Planner row estimate for a table; exact count if never analyzed"""
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+        {"t": model.__tablename__},
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return db.query(model).count()
+    return estimate
+
+
 @router.get("/stats", response_model=AdminStats)
 async def get_admin_stats(
     current_user: User = Depends(verify_admin_user), db: Session = Depends(get_db)
 ):
     """Get admin dashboard statistics"""
     try:
-        today = datetime.utcnow().date()
-
-        # Basic stats
-        total_users = db.query(User).filter(User.is_active == True).count()
-        active_today = (
-            db.query(User)
-            .filter(User.last_login >= today, User.is_active == True)
-            .count()
-        )
-
-        content_today = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.created_at >= today,
-                ContentSession.status == ContentStatus.COMPLETED,
+        # Figures come from a one-row materialized view the worker refreshes
+        # every minute, so dashboard polling never rescans the source tables
+        stats = db.execute(
+            text(
+                "SELECT total_users, active_today, attempts, completed, failed, "
+                "revenue, top_content_types, user_growth FROM admin_daily_stats"
             )
-            .count()
-        )
+        ).one()
 
-        # Revenue calculation
-        monthly_revenue = (
-            db.query(func.sum(CreditTransaction.cost_usd))
-            .filter(
-                CreditTransaction.transaction_type == TransactionType.PURCHASE,
-                CreditTransaction.created_at >= datetime.utcnow().replace(day=1),
-                CreditTransaction.status == "completed",
-            )
-            .scalar()
-            or 0
-        )
-
-        revenue_usd = monthly_revenue / 100 if monthly_revenue else 0
-
-        # Top content types
-        content_type_stats = (
-            db.query(
-                ContentSession.content_type,
-                func.count(ContentSession.id).label("count"),
-            )
-            .filter(
-                ContentSession.status == ContentStatus.COMPLETED,
-                ContentSession.created_at >= datetime.utcnow() - timedelta(days=30),
-            )
-            .group_by(ContentSession.content_type)
-            .order_by(func.count(ContentSession.id).desc())
-            .limit(5)
-            .all()
-        )
+        revenue_usd = float(stats.revenue) / 100 if stats.revenue else 0
 
+        # Enum columns come back as member names inside JSON
         top_content_types = [
-            {"content_type": ct.value, "count": count}
-            for ct, count in content_type_stats
+            {
+                "content_type": ContentType[row["content_type"]].value,
+                "count": row["count"],
+            }
+            for row in stats.top_content_types or []
         ]
 
-        # User growth (last 30 days)
-        growth_data = (
-            db.query(
-                func.date(User.created_at).label("date"),
-                func.count(User.id).label("count"),
-            )
-            .filter(User.created_at >= datetime.utcnow() - timedelta(days=30))
-            .group_by(func.date(User.created_at))
-            .order_by(func.date(User.created_at))
-            .all()
-        )
-
-        user_growth = [
-            {"date": date.isoformat(), "new_users": count}
-            for date, count in growth_data
-        ]
+        user_growth = stats.user_growth or []
 
         # Error rate (simplified calculation)
-        total_content_attempts = (
-            db.query(ContentSession).filter(ContentSession.created_at >= today).count()
-        )
-
-        failed_content = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.created_at >= today,
-                ContentSession.status == ContentStatus.FAILED,
-            )
-            .count()
-        )
-
         error_rate = (
-            (failed_content / total_content_attempts * 100)
-            if total_content_attempts > 0
-            else 0
+            (stats.failed / stats.attempts * 100) if stats.attempts > 0 else 0
         )
 
         return AdminStats(
-            total_users=total_users,
-            active_users_today=active_today,
-            content_generated_today=content_today,
+            total_users=stats.total_users,
+            active_users_today=stats.active_today,
+            content_generated_today=stats.completed,
             revenue_this_month=revenue_usd,
             top_content_types=top_content_types,
             user_growth=user_growth,
@@ -168,8 +117,38 @@ async def get_users(
 ):
     """Get user management list"""
     try:
-        users = (
-            db.query(User)
+        # Aggregate per user before joining so the two joins don't fan out
+        content_counts = (
+            db.query(
+                ContentSession.user_id.label("user_id"),
+                func.count(ContentSession.id).label("total_content"),
+            )
+            .filter(ContentSession.status == ContentStatus.COMPLETED)
+            .group_by(ContentSession.user_id)
+            .subquery()
+        )
+
+        purchase_totals = (
+            db.query(
+                CreditTransaction.user_id.label("user_id"),
+                func.sum(CreditTransaction.cost_usd).label("total_spent"),
+            )
+            .filter(
+                CreditTransaction.transaction_type == TransactionType.PURCHASE,
+                CreditTransaction.status == "completed",
+            )
+            .group_by(CreditTransaction.user_id)
+            .subquery()
+        )
+
+        rows = (
+            db.query(
+                User,
+                func.coalesce(content_counts.c.total_content, 0),
+                func.coalesce(purchase_totals.c.total_spent, 0),
+            )
+            .outerjoin(content_counts, content_counts.c.user_id == User.id)
+            .outerjoin(purchase_totals, purchase_totals.c.user_id == User.id)
             .filter(User.is_active == True)
             .order_by(User.created_at.desc())
             .offset(offset)
@@ -177,35 +156,14 @@ async def get_users(
             .all()
         )
 
-        user_list = []
-        for user in users:
-            # Get user content count
-            content_count = (
-                db.query(ContentSession)
-                .filter(
-                    ContentSession.user_id == user.id,
-                    ContentSession.status == ContentStatus.COMPLETED,
-                )
-                .count()
-            )
-
-            # Get total spent
-            total_spent = (
-                db.query(func.sum(CreditTransaction.cost_usd))
-                .filter(
-                    CreditTransaction.user_id == user.id,
-                    CreditTransaction.transaction_type == TransactionType.PURCHASE,
-                    CreditTransaction.status == "completed",
-                )
-                .scalar()
-                or 0
-            )
-
-            # Decrypt email for admin view
-            from ..auth import field_encryption
-
-            email = field_encryption.decrypt(user.email_encrypted)
+        # Decrypt the page's emails in one worker-thread hop rather than
+        # serially on the event loop
+        emails = await asyncio.to_thread(
+            field_encryption.decrypt_many, [user.email_encrypted for user, _, _ in rows]
+        )
 
+        user_list = []
+        for (user, content_count, total_spent), email in zip(rows, emails):
             user_list.append(
                 UserManagement(
                     user_id=str(user.id),
@@ -391,30 +349,38 @@ async def get_system_health(
 ):
     """Get detailed system health information"""
     try:
-        # Database stats
-        total_users = db.query(User).count()
-        total_content = db.query(ContentSession).count()
+        # Database stats (estimates are plenty for a health dashboard)
+        total_users = _approx_count(db, User)
+        total_content = _approx_count(db, ContentSession)
 
-        # Recent errors
-        recent_errors = (
-            db.query(ContentSession)
+        # Recent errors and queue health in one scan
+        content_stats = db.query(
+            func.count()
             .filter(
                 ContentSession.status == ContentStatus.FAILED,
                 ContentSession.created_at >= datetime.utcnow() - timedelta(hours=24),
             )
-            .count()
-        )
-
-        # Queue health (simplified)
-        pending_content = (
-            db.query(ContentSession)
+            .label("recent_errors"),
+            func.count()
             .filter(
                 ContentSession.status.in_(
                     [ContentStatus.PENDING, ContentStatus.PROCESSING]
                 )
             )
-            .count()
-        )
+            .label("pending"),
+        ).filter(
+            # Only these statuses matter, letting the status index bound the scan
+            ContentSession.status.in_(
+                [
+                    ContentStatus.FAILED,
+                    ContentStatus.PENDING,
+                    ContentStatus.PROCESSING,
+                ]
+            )
+        ).one()
+
+        recent_errors = content_stats.recent_errors
+        pending_content = content_stats.pending
 
         return {
             "database": {
@@ -4,15 +4,29 @@ Login, registration, logout endpoints
 """
 
 import logging
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends, Request, status
+import time
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    HTTPException,
+    Depends,
+    Request,
+    status,
+)
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..schemas import UserRegister, UserLogin, TokenResponse, SuccessResponse
-from ..auth import auth_service, get_current_user, get_client_info
-from ..rate_limiter import rate_limit, ip_rate_limit
-from ..worker import send_email_notification
+from ..auth import (
+    auth_service,
+    session_cache,
+    get_current_user,
+    get_current_active_user,
+    get_client_info,
+)
+from ..rate_limiter import ip_rate_limit
+from ..config import settings
+from ..worker import send_email_notification, revoke_session_in_db
 from ..models import User
 
 # Configure logging
@@ -21,18 +35,25 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Blacklist TTL when the session's expiry isn't known: outlives the longest
+# possible (remember-me) session
+SESSION_REVOKED_TTL = settings.SESSION_EXPIRE_DAYS * 2 * 86400
+
 
 @router.post("/register", response_model=TokenResponse)
 @ip_rate_limit("registration", 3, 86400)  # 3 registrations per day per IP
 async def register(
-    user_data: UserRegister, request: Request, db: Session = Depends(get_db)
+    user_data: UserRegister,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
 ):
     """Register new user account"""
     try:
         ip, user_agent = get_client_info(request)
 
-        # Create user
-        user = auth_service.create_user(
+        # Create user (Argon2 hashing runs off the event loop)
+        user = await auth_service.create_user(
             email=user_data.email,
             password=user_data.password,
             first_name=user_data.first_name,
@@ -44,7 +65,7 @@ async def register(
         )
 
         # Create session
-        token, expires_at = auth_service.create_session_token(
+        token, expires_at_epoch = auth_service.create_session_token(
             user_id=str(user.id),
             ip_address=ip,
             user_agent=user_agent,
@@ -52,8 +73,10 @@ async def register(
             db=db,
         )
 
-        # Send welcome email
-        send_email_notification.delay(
+        # Send welcome email; queued after the response so the broker
+        # round-trip stays off the request path
+        background_tasks.add_task(
+            send_email_notification.delay,
             email=user_data.email,
             template="welcome",
             context={"first_name": user_data.first_name, "credits": user.credits},
@@ -63,7 +86,7 @@ async def register(
 
         return TokenResponse(
             token=token,
-            expires_in=int((expires_at - datetime.utcnow()).total_seconds()),
+            expires_in=expires_at_epoch - int(time.time()),
             user=user.to_dict(),
         )
 
@@ -78,7 +101,7 @@ async def register(
 
 
 @router.post("/login", response_model=TokenResponse)
-@rate_limit("login")
+@ip_rate_limit("login", 5, 300)  # 5 attempts per 5 minutes per IP
 async def login(
     credentials: UserLogin, request: Request, db: Session = Depends(get_db)
 ):
@@ -86,9 +109,11 @@ async def login(
     try:
         ip, user_agent = get_client_info(request)
 
-        # Authenticate user
-        user = auth_service.authenticate_user(
-            email=credentials.email, password=credentials.password, db=db
+        # Authenticate user (Argon2 verification runs off the event loop)
+        user = await auth_service.authenticate_user(
+            email=credentials.email,
+            password=credentials.password,
+            db=db,
         )
 
         if not user:
@@ -98,7 +123,7 @@ async def login(
             )
 
         # Create session
-        token, expires_at = auth_service.create_session_token(
+        token, expires_at_epoch = auth_service.create_session_token(
             user_id=str(user.id),
             ip_address=ip,
             user_agent=user_agent,
@@ -110,7 +135,7 @@ async def login(
 
         return TokenResponse(
             token=token,
-            expires_in=int((expires_at - datetime.utcnow()).total_seconds()),
+            expires_in=expires_at_epoch - int(time.time()),
             user=user.to_dict(),
         )
 
@@ -125,28 +150,33 @@ async def login(
 
 @router.post("/logout", response_model=SuccessResponse)
 async def logout(
-    current_user: User = Depends(get_current_user),
-    request: Request = None,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """User logout"""
     try:
-        # Get token from request
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            token = auth_header[7:]
-
-            # Revoke session
+        # Parsed and validated by the auth dependency
+        token = request.state.auth_token
+        expires_at = request.state.auth_expires_at
+
+        # The blacklist entry only needs to outlive the session itself
+        revoked_ttl = SESSION_REVOKED_TTL
+        if expires_at:
+            revoked_ttl = max(expires_at - int(time.time()), 1)
+
+        # Revoke session in Redis (checked first on every request); the
+        # database row is marked inactive by a background task
+        if await session_cache.revoke(session_cache.hash_token(token), revoked_ttl):
+            background_tasks.add_task(revoke_session_in_db.delay, token)
+        else:
+            # Redis unavailable: revoke in the database right away
             auth_service.revoke_session(token, db)
 
-            logger.info(f"User logged out: {current_user.id}")
+        logger.info(f"User logged out: {current_user.id}")
 
-            return SuccessResponse(message="Logged out successfully")
-
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid authorization header",
-        )
+        return SuccessResponse(message="Logged out successfully")
 
     except HTTPException:
         raise
@@ -163,9 +193,10 @@ async def logout_all_devices(
 ):
     """Logout from all devices"""
     try:
-        count = auth_service.revoke_all_user_sessions(str(current_user.id), db)
+        tokens = auth_service.revoke_all_user_sessions(str(current_user.id), db)
+        await session_cache.delete(*(session_cache.hash_token(t) for t in tokens))
 
-        return SuccessResponse(message=f"Logged out from {count} devices")
+        return SuccessResponse(message=f"Logged out from {len(tokens)} devices")
 
     except Exception as e:
         logger.error(f"Logout all failed: {e}")
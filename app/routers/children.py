@@ -4,16 +4,28 @@ Child profiles, preferences, and settings - Fixed validation issues
 """
 
 import logging
-from datetime import datetime
+import uuid
 from typing import List
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
-
-from ..database import get_db
-from ..schemas import ChildCreate, ChildUpdate, ChildProfile, SuccessResponse
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, insert
+
+from ..database import get_db, redis_manager
+from ..schemas import (
+    ChildCreate,
+    ChildUpdate,
+    ChildProfile,
+    SuccessResponse,
+    VALID_CONTENT_DIFFICULTIES,
+    VALID_INTERESTS,
+    VALID_LANGUAGES,
+    VALID_LEARNING_LEVELS,
+)
 from ..auth import get_current_active_user, field_encryption
 from ..rate_limiter import rate_limit
 from ..models import User, Child, ContentSession, ContentStatus
+from .dashboard import invalidate_dashboard_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -21,6 +33,39 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Columns needed to build a ChildProfile (skips full_name_encrypted etc.)
+CHILD_PROFILE_COLUMNS = (
+    Child.id,
+    Child.user_id,
+    Child.nickname_encrypted,
+    Child.age_group,
+    Child.learning_level,
+    Child.interests,
+    Child.preferred_language,
+    Child.content_difficulty,
+    Child.avatar_id,
+    Child.created_at,
+    Child.last_used,
+)
+
+# Seconds child profile responses stay cached
+CHILD_CACHE_TTL = 120
+
+_child_profiles_adapter = TypeAdapter(List[ChildProfile])
+
+
+# Profile cache: one Redis hash per user ("all" -> list, "child:<id>" -> profile),
+# so a single DEL invalidates every cached view of that user's children
+def _children_cache_key(user_id) -> str:
+    """Cache hash holding a user's child profiles"""
+    return f"children:{user_id}"
+
+
+async def invalidate_children_cache(user_id) -> None:
+    """Drop all cached child profiles for a user"""
+    await redis_manager.delete(_children_cache_key(user_id))
+    await invalidate_dashboard_cache(user_id)
+
 
 @router.post("", response_model=ChildProfile)
 @rate_limit("api")
@@ -47,38 +92,18 @@ async def create_child(
                 detail="Age must be between 2 and 12 years",
             )
 
-        # Check if user has reached child limit (e.g., 5 children max)
-        existing_children = (
-            db.query(Child)
-            .filter(Child.user_id == current_user.id, Child.is_active == True)
-            .count()
-        )
-
-        if existing_children >= 5:
+        # Check if user has reached child limit (e.g., 5 children max); the
+        # count is kept current by a database trigger on children
+        if current_user.active_children_count >= 5:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Maximum number of children reached (5)",
             )
 
         # Validate interests
-        valid_interests = [
-            "animals",
-            "space",
-            "math",
-            "science",
-            "art",
-            "music",
-            "sports",
-            "cooking",
-            "nature",
-            "stories",
-            "puzzles",
-            "history",
-        ]
-
         if child_data.interests:
             invalid_interests = [
-                i for i in child_data.interests if i not in valid_interests
+                i for i in child_data.interests if i not in VALID_INTERESTS
             ]
             if invalid_interests:
                 raise HTTPException(
@@ -98,41 +123,53 @@ async def create_child(
         if child_data.preferred_language and child_data.preferred_language.strip():
             preferred_language = child_data.preferred_language.strip()
 
-        # Create child with proper encryption
-        child = Child(
-            user_id=current_user.id,
-            nickname_encrypted=field_encryption.encrypt(child_data.nickname.strip()),
-            full_name_encrypted=field_encryption.encrypt(child_data.full_name.strip())
-            if child_data.full_name and child_data.full_name.strip()
-            else None,
-            age_group=child_data.age_group,
-            learning_level=child_data.learning_level or "beginner",
-            interests=child_data.interests or [],
-            preferred_language=preferred_language,  # This can be None
-            content_difficulty=child_data.content_difficulty or "age_appropriate",
-            avatar_id=child_data.avatar_id or 1,
-        )
-
-        db.add(child)
+        nickname = child_data.nickname.strip()
+        learning_level = child_data.learning_level or "beginner"
+        interests = child_data.interests or []
+        content_difficulty = child_data.content_difficulty or "age_appropriate"
+        avatar_id = child_data.avatar_id or 1
+
+        # Create child with proper encryption; RETURNING hands back the
+        # generated fields so no refresh SELECT is needed
+        row = db.execute(
+            insert(Child)
+            .values(
+                user_id=current_user.id,
+                nickname_encrypted=field_encryption.encrypt(nickname),
+                full_name_encrypted=field_encryption.encrypt(
+                    child_data.full_name.strip()
+                )
+                if child_data.full_name and child_data.full_name.strip()
+                else None,
+                age_group=child_data.age_group,
+                learning_level=learning_level,
+                interests=interests,
+                preferred_language=preferred_language,  # This can be None
+                content_difficulty=content_difficulty,
+                avatar_id=avatar_id,
+            )
+            .returning(Child.id, Child.created_at, Child.last_used)
+        ).one()
         db.commit()
-        db.refresh(child)
 
         logger.info(
-            f"Child profile created successfully for user {current_user.id}, child ID: {child.id}"
+            f"Child profile created successfully for user {current_user.id}, child ID: {row.id}"
         )
 
-        # Return the created child profile
+        await invalidate_children_cache(current_user.id)
+
+        # Return the created child profile from the values just written
         return ChildProfile(
-            id=str(child.id),
-            nickname=field_encryption.decrypt(child.nickname_encrypted),
-            age_group=child.age_group,
-            learning_level=child.learning_level,
-            interests=child.interests,
-            preferred_language=child.get_effective_language(),
-            content_difficulty=child.content_difficulty,
-            avatar_id=child.avatar_id,
-            created_at=child.created_at,
-            last_used=child.last_used,
+            id=str(row.id),
+            nickname=nickname,
+            age_group=child_data.age_group,
+            learning_level=learning_level,
+            interests=interests,
+            preferred_language=preferred_language or current_user.preferred_language,
+            content_difficulty=content_difficulty,
+            avatar_id=avatar_id,
+            created_at=row.created_at,
+            last_used=row.last_used,
             content_count=0,
         )
 
@@ -153,42 +190,59 @@ async def get_children(
 ):
     """Get user's children"""
     try:
+        cached = await redis_manager.hget_cached(
+            _children_cache_key(current_user.id), "all"
+        )
+        if cached:
+            return Response(content=cached, media_type="application/json")
+
         children = (
             db.query(Child)
+            .options(load_only(*CHILD_PROFILE_COLUMNS))
             .filter(Child.user_id == current_user.id, Child.is_active == True)
             .order_by(Child.created_at.desc())
             .all()
         )
 
-        result = []
-        for child in children:
-            # Get content count
-            content_count = (
-                db.query(ContentSession)
+        # Completed content counts for all children in one query
+        content_counts = {}
+        if children:
+            content_counts = dict(
+                db.query(ContentSession.child_id, func.count(ContentSession.id))
                 .filter(
-                    ContentSession.child_id == child.id,
+                    ContentSession.child_id.in_([child.id for child in children]),
                     ContentSession.status == ContentStatus.COMPLETED,
                 )
-                .count()
+                .group_by(ContentSession.child_id)
+                .all()
             )
 
-            # Safely decrypt nickname
-            nickname = None
-            if child.nickname_encrypted:
-                try:
-                    nickname = field_encryption.decrypt(child.nickname_encrypted)
-                except Exception as e:
-                    logger.error(f"Failed to decrypt child nickname: {e}")
-                    nickname = f"Child {child.age_group}"
+        # Rows come straight from the ORM, so skip Pydantic validation
+        nicknames = field_encryption.decrypt_many(
+            [child.nickname_encrypted for child in children]
+        )
+
+        result = []
+        for child, nickname in zip(children, nicknames):
+            child_id_str = str(child.id)
+            content_count = content_counts.get(child.id, 0)
+
+            # Fall back to a generic label when the nickname can't be decrypted
+            if not child.nickname_encrypted:
+                nickname = None
+            elif not nickname:
+                nickname = f"Child {child.age_group}"
 
             result.append(
-                ChildProfile(
-                    id=str(child.id),
+                ChildProfile.model_construct(
+                    id=child_id_str,
                     nickname=nickname,
                     age_group=child.age_group,
                     learning_level=child.learning_level,
                     interests=child.interests,
-                    preferred_language=child.get_effective_language(),
+                    preferred_language=child.get_effective_language(
+                        current_user.preferred_language
+                    ),
                     content_difficulty=child.content_difficulty,
                     avatar_id=child.avatar_id,
                     created_at=child.created_at,
@@ -197,7 +251,13 @@ async def get_children(
                 )
             )
 
-        return result
+        payload = _child_profiles_adapter.dump_json(result)
+        await redis_manager.hset_cached(
+            _children_cache_key(current_user.id), "all", payload, CHILD_CACHE_TTL
+        )
+
+        # Return the serialized payload so FastAPI doesn't re-validate it
+        return Response(content=payload, media_type="application/json")
 
     except Exception as e:
         logger.error(f"Get children failed: {e}")
@@ -215,10 +275,27 @@ async def get_child(
 ):
     """Get specific child profile"""
     try:
+        # Only real ids reach the cache, so a path like "all" can't hit the
+        # list field and junk ids don't each get a field of their own
+        try:
+            child_uuid = uuid.UUID(child_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Child not found"
+            )
+        cache_field = f"child:{child_uuid}"
+
+        cached = await redis_manager.hget_cached(
+            _children_cache_key(current_user.id), cache_field
+        )
+        if cached:
+            return Response(content=cached, media_type="application/json")
+
         child = (
             db.query(Child)
+            .options(load_only(*CHILD_PROFILE_COLUMNS))
             .filter(
-                Child.id == child_id,
+                Child.id == child_uuid,
                 Child.user_id == current_user.id,
                 Child.is_active == True,
             )
@@ -232,12 +309,12 @@ async def get_child(
 
         # Get content count
         content_count = (
-            db.query(ContentSession)
+            db.query(func.count(ContentSession.id))
             .filter(
                 ContentSession.child_id == child.id,
                 ContentSession.status == ContentStatus.COMPLETED,
             )
-            .count()
+            .scalar()
         )
 
         # Safely decrypt nickname
@@ -249,13 +326,15 @@ async def get_child(
                 logger.error(f"Failed to decrypt child nickname: {e}")
                 nickname = f"Child {child.age_group}"
 
-        return ChildProfile(
+        profile = ChildProfile.model_construct(
             id=str(child.id),
             nickname=nickname,
             age_group=child.age_group,
             learning_level=child.learning_level,
             interests=child.interests,
-            preferred_language=child.get_effective_language(),
+            preferred_language=child.get_effective_language(
+                current_user.preferred_language
+            ),
             content_difficulty=child.content_difficulty,
             avatar_id=child.avatar_id,
             created_at=child.created_at,
@@ -263,6 +342,16 @@ async def get_child(
             content_count=content_count,
         )
 
+        payload = profile.model_dump_json()
+        await redis_manager.hset_cached(
+            _children_cache_key(current_user.id),
+            cache_field,
+            payload,
+            CHILD_CACHE_TTL,
+        )
+
+        return Response(content=payload, media_type="application/json")
+
     except HTTPException:
         raise
     except Exception as e:
@@ -299,15 +388,15 @@ async def update_child(
             )
 
         # Validate update data
+        new_nickname = None
         if update_data.nickname is not None:
-            if len(update_data.nickname.strip()) == 0:
+            new_nickname = update_data.nickname.strip()
+            if len(new_nickname) == 0:
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail="Nickname cannot be empty",
                 )
-            child.nickname_encrypted = field_encryption.encrypt(
-                update_data.nickname.strip()
-            )
+            child.nickname_encrypted = field_encryption.encrypt(new_nickname)
 
         if update_data.full_name is not None:
             child.full_name_encrypted = (
@@ -325,11 +414,7 @@ async def update_child(
             child.age_group = update_data.age_group
 
         if update_data.learning_level:
-            if update_data.learning_level not in [
-                "beginner",
-                "intermediate",
-                "advanced",
-            ]:
+            if update_data.learning_level not in VALID_LEARNING_LEVELS:
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail="Learning level must be beginner, intermediate, or advanced",
@@ -338,22 +423,8 @@ async def update_child(
 
         if update_data.interests is not None:
             # Validate interests
-            valid_interests = [
-                "animals",
-                "space",
-                "math",
-                "science",
-                "art",
-                "music",
-                "sports",
-                "cooking",
-                "nature",
-                "stories",
-                "puzzles",
-                "history",
-            ]
             invalid_interests = [
-                i for i in update_data.interests if i not in valid_interests
+                i for i in update_data.interests if i not in VALID_INTERESTS
             ]
             if invalid_interests:
                 raise HTTPException(
@@ -363,7 +434,7 @@ async def update_child(
             child.interests = update_data.interests
 
         if update_data.preferred_language:
-            if update_data.preferred_language not in ["ar", "en", "fr", "de"]:
+            if update_data.preferred_language not in VALID_LANGUAGES:
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail="Language must be ar, en, fr, or de",
@@ -371,11 +442,7 @@ async def update_child(
             child.preferred_language = update_data.preferred_language
 
         if update_data.content_difficulty:
-            if update_data.content_difficulty not in [
-                "easy",
-                "age_appropriate",
-                "challenging",
-            ]:
+            if update_data.content_difficulty not in VALID_CONTENT_DIFFICULTIES:
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail="Content difficulty must be easy, age_appropriate, or challenging",
@@ -390,22 +457,23 @@ async def update_child(
                 )
             child.avatar_id = update_data.avatar_id
 
-        child.updated_at = datetime.utcnow()
         db.commit()
 
+        await invalidate_children_cache(current_user.id)
+
         # Return updated child
         content_count = (
-            db.query(ContentSession)
+            db.query(func.count(ContentSession.id))
             .filter(
                 ContentSession.child_id == child.id,
                 ContentSession.status == ContentStatus.COMPLETED,
             )
-            .count()
+            .scalar()
         )
 
-        # Safely decrypt nickname
-        nickname = None
-        if child.nickname_encrypted:
+        # Reuse the plaintext just written; decrypt only an unchanged nickname
+        nickname = new_nickname
+        if nickname is None and child.nickname_encrypted:
             try:
                 nickname = field_encryption.decrypt(child.nickname_encrypted)
             except Exception as e:
@@ -418,7 +486,9 @@ async def update_child(
             age_group=child.age_group,
             learning_level=child.learning_level,
             interests=child.interests,
-            preferred_language=child.get_effective_language(),
+            preferred_language=child.get_effective_language(
+                current_user.preferred_language
+            ),
             content_difficulty=child.content_difficulty,
             avatar_id=child.avatar_id,
             created_at=child.created_at,
@@ -458,10 +528,11 @@ async def delete_child(
 
         # Soft delete - just mark as inactive
         child.is_active = False
-        child.updated_at = datetime.utcnow()
 
         db.commit()
 
+        await invalidate_children_cache(current_user.id)
+
         return SuccessResponse(message="Child profile deleted successfully")
 
     except HTTPException:
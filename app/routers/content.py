@@ -3,13 +3,24 @@ Kiddos - Content Generation Router
 AI content creation, approval, and management
 """
 
+import asyncio
 import logging
-import json
+import time
+import uuid
+import orjson
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, selectinload
+from typing import List, Optional
+from ..database import (
+    AsyncSessionLocal,
+    async_redis_pubsub_client,
+    get_async_db,
+    redis_manager,
+)
 from ..schemas import (
     ContentRequest,
     ContentResponse,
@@ -21,9 +32,11 @@ from ..schemas import (
     PaginationParams,
     SuccessResponse,
 )
-from ..auth import get_current_active_user, field_encryption
-from ..rate_limiter import rate_limit
-from ..claude_service import check_topic_safety
+from ..auth import (
+    get_current_active_user_async,
+    field_encryption,
+)
+from ..rate_limiter import rate_limit, rate_limiter, RATE_LIMITS
 from ..models import (
     User,
     Child,
@@ -32,35 +45,127 @@ from ..models import (
     ContentType,
     calculate_content_cost,
 )
-from ..worker import generate_content_task
+from ..worker import enqueue_content_generation, FINAL_CONTENT_STATUSES
+from .dashboard import invalidate_dashboard_cache
 from ..config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Create router
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+CONTENT_CACHE_TTL = 300
+
+# SSE status stream: give up after the Celery hard time limit, ping in between
+CONTENT_EVENTS_TIMEOUT = 300
+CONTENT_EVENTS_KEEPALIVE = 15
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Open /events streams per process, one per subscription connection
+_event_stream_slots = asyncio.Semaphore(settings.REDIS_PUBSUB_POOL_SIZE)
+
+# Event payload statuses that end a /events stream
+FINAL_EVENT_STATUSES = frozenset(s.value for s in FINAL_CONTENT_STATUSES)
+
+
+# Decrypted content cache: one Redis hash per user session ("content" -> the
+# /content payload, "status" -> the completed /status payload). The user id in
+# the key doubles as the ownership check on a cache hit.
+def _content_cache_key(user_id, session_id: str) -> Optional[str]:
+    """Cache key for a session, keyed by the parsed UUID; None if malformed"""
+    # Any spelling of the id must hit the key that approval/regeneration drop
+    session_pk = _parse_session_id(session_id)
+    if session_pk is None:
+        return None
+    return f"content:{user_id}:{session_pk}"
+
+
+async def _get_cached_content(user_id, session_id: str, field: str) -> Optional[str]:
+    """Get cached JSON for a completed content session"""
+    key = _content_cache_key(user_id, session_id)
+    if key is None:
+        return None
+    return await redis_manager.hget_cached(key, field)
+
+
+async def _cache_content(user_id, session_id: str, field: str, payload: bytes) -> None:
+    """Cache serialized content for CONTENT_CACHE_TTL seconds"""
+    key = _content_cache_key(user_id, session_id)
+    if key is None:
+        return
+    await redis_manager.hset_cached(key, field, payload, CONTENT_CACHE_TTL)
+
+
+async def _invalidate_content_cache(user_id, session_id: str) -> None:
+    """Drop cached content for a session"""
+    key = _content_cache_key(user_id, session_id)
+    if key is not None:
+        await redis_manager.delete(key)
+
+
+def _parse_session_id(session_id: str) -> Optional[uuid.UUID]:
+    """Parse a session id path parameter, None if malformed"""
+    try:
+        return uuid.UUID(session_id)
+    except ValueError:
+        return None
+
+
+async def _get_user_session(
+    db: AsyncSession, session_id: str, user_id: uuid.UUID, options=None
+) -> Optional[ContentSession]:
+    """Fetch a content session by primary key if it belongs to the user"""
+    session_pk = _parse_session_id(session_id)
+    if session_pk is None:
+        return None
+
+    # Identity-map hit skips SQL; a miss is a plain primary key lookup
+    session = await db.get(ContentSession, session_pk, options=options)
+    if session is None or session.user_id != user_id:
+        return None
+    return session
+
+
+def _merge_metadata(content_json: bytes, metadata: dict) -> bytes:
+    """Append metadata keys to a serialized JSON object without parsing it"""
+    body = content_json.strip()
+    if not (body.startswith(b"{") and body.endswith(b"}")):
+        raise ValueError("Generated content is not a JSON object")
+    body = body[:-1].rstrip()
+    separator = b"" if body.endswith(b"{") else b","
+    # Metadata comes last, so it wins over duplicate keys like dict.update did
+    return body + separator + orjson.dumps(metadata)[1:]
+
+
+def _session_metadata(session_id: str, session: ContentSession) -> dict:
+    """Session metadata merged into content responses"""
+    return {
+        "session_id": session_id,
+        "content_type": session.content_type.value,
+        "age_group": session.age_group,
+        "language": session.language,
+        "topic": session.topic,
+        "difficulty_level": session.difficulty_level,
+        "credits_used": session.credits_cost,
+        "generation_time": session.generation_duration_seconds,
+        "safety_approved": session.safety_approved,
+        "parent_approved": session.parent_approved,
+        "created_at": session.created_at.isoformat(),
+        "expires_at": session.expires_at.isoformat() if session.expires_at else None,
+    }
 
 
 @router.post("/generate", response_model=ContentResponse)
 async def generate_content(
     content_request: ContentRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Generate educational content with optional images"""
     try:
-        # Validate topic safety first
-        is_safe, safety_reason = await check_topic_safety(
-            content_request.topic, content_request.age_group
-        )
-
-        if not is_safe:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Topic not appropriate: {safety_reason}",
-            )
-
+        # Topic safety is checked by the worker; failures surface as REJECTED.
         # Calculate credit cost with image option
         credit_cost = calculate_content_cost(
             content_request.content_type,
@@ -91,11 +196,12 @@ async def generate_content(
         )
 
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        await db.refresh(session)
+        await invalidate_dashboard_cache(current_user.id)
 
         # Queue background task for content generation
-        task = generate_content_task.delay(str(session.id))
+        enqueue_content_generation(str(session.id), content_request.include_images)
 
         logger.info(
             f"Content generation queued for user {current_user.id}, session {session.id}, images: {content_request.include_images}"
@@ -114,7 +220,7 @@ async def generate_content(
         raise
     except Exception as e:
         logger.error(f"Content generation failed: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to start content generation",
@@ -125,54 +231,35 @@ async def generate_content(
 @router.get("/debug-model/{session_id}")
 async def debug_content_session_model(
     session_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Debug what fields actually exist in ContentSession"""
     try:
-        session = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.id == session_id,
-                ContentSession.user_id == current_user.id,
-            )
-            .first()
-        )
+        session = await _get_user_session(db, session_id, current_user.id)
 
         if not session:
             return {"error": "Session not found"}
 
-        # Get all attributes of the session object
+        # Only mapped columns, so no relationship loads or descriptor probing
         session_attrs = []
-        for attr in dir(session):
-            if not attr.startswith("_") and not callable(getattr(session, attr, None)):
-                try:
-                    value = getattr(session, attr)
-                    # Convert complex types to string for JSON serialization
-                    if hasattr(value, "isoformat"):
-                        value = value.isoformat()
-                    elif hasattr(value, "value"):
-                        value = value.value
-                    elif isinstance(value, bytes):
-                        value = f"<bytes: {len(value)} bytes>"
-
-                    session_attrs.append(
-                        {
-                            "field": attr,
-                            "type": str(type(getattr(session, attr))),
-                            "value": str(value)[:100]
-                            if value
-                            else None,  # Limit to 100 chars
-                        }
-                    )
-                except Exception as e:
-                    session_attrs.append(
-                        {
-                            "field": attr,
-                            "type": "error",
-                            "value": f"Error accessing: {str(e)}",
-                        }
-                    )
+        for column in ContentSession.__table__.columns:
+            value = getattr(session, column.key)
+            # Convert complex types to string for JSON serialization
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            elif hasattr(value, "value"):
+                value = value.value
+            elif isinstance(value, bytes):
+                value = f"<bytes: {len(value)} bytes>"
+
+            session_attrs.append(
+                {
+                    "field": column.key,
+                    "type": str(column.type),
+                    "value": str(value)[:100] if value else None,  # Limit to 100 chars
+                }
+            )
 
         return {
             "session_id": session_id,
@@ -189,19 +276,16 @@ async def debug_content_session_model(
 @router.get("/content/{session_id}")
 async def get_session_content(
     session_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get the actual content for a completed session - FIXED"""
     try:
-        session = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.id == session_id,
-                ContentSession.user_id == current_user.id,
-            )
-            .first()
-        )
+        cached = await _get_cached_content(current_user.id, session_id, "content")
+        if cached:
+            return Response(content=cached, media_type="application/json")
+
+        session = await _get_user_session(db, session_id, current_user.id)
 
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -219,23 +303,10 @@ async def get_session_content(
                 status_code=400, detail="Content is not ready or approved"
             )
 
-        # FIXED: Handle both bytes and string from decryption
         try:
-            from app.auth import field_encryption
-
-            decrypted_content = field_encryption.decrypt(session.generated_content)
-
-            # FIXED: Check if decrypted_content is bytes or string
-            if isinstance(decrypted_content, bytes):
-                content_text = decrypted_content.decode("utf-8")
-            elif isinstance(decrypted_content, str):
-                content_text = decrypted_content
-            else:
-                logger.error(
-                    f"Unexpected decrypted content type: {type(decrypted_content)}"
-                )
-                raise HTTPException(status_code=500, detail="Failed to decrypt content")
-
+            content_json = await asyncio.to_thread(
+                field_encryption.decrypt_bytes, session.generated_content
+            )
             logger.info(f"Content decrypted successfully for session {session_id}")
 
         except Exception as decrypt_error:
@@ -247,38 +318,22 @@ async def get_session_content(
                 detail=f"Failed to decrypt content: {str(decrypt_error)}",
             )
 
-        # FIXED: Parse JSON with better error handling
+        # Splice metadata into the stored JSON object instead of reparsing it
         try:
-            content_dict = json.loads(content_text)
-        except json.JSONDecodeError as json_error:
+            payload = _merge_metadata(
+                content_json, _session_metadata(session_id, session)
+            )
+        except ValueError as json_error:
             logger.error(
                 f"JSON parsing failed for session {session_id}: {str(json_error)}"
             )
-            logger.error(f"Content preview: {content_text[:200]}...")
+            logger.error(f"Content preview: {content_json[:200]}...")
             raise HTTPException(status_code=500, detail="Failed to parse content JSON")
 
-        # Add metadata
-        content_dict.update(
-            {
-                "session_id": session_id,
-                "content_type": session.content_type.value,
-                "age_group": session.age_group,
-                "language": session.language,
-                "topic": session.topic,
-                "difficulty_level": session.difficulty_level,
-                "credits_used": session.credits_cost,
-                "generation_time": session.generation_duration_seconds,
-                "safety_approved": session.safety_approved,
-                "parent_approved": session.parent_approved,
-                "created_at": session.created_at.isoformat(),
-                "expires_at": session.expires_at.isoformat()
-                if session.expires_at
-                else None,
-            }
-        )
+        await _cache_content(current_user.id, session_id, "content", payload)
 
         logger.info(f"Content successfully returned for session {session_id}")
-        return content_dict
+        return Response(content=payload, media_type="application/json")
 
     except HTTPException:
         raise
@@ -293,18 +348,21 @@ async def get_session_content(
 @router.get("/status/{session_id}")
 async def get_content_status(
     session_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get content generation status - FIXED to include content when completed"""
     try:
-        session = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.id == session_id,
-                ContentSession.user_id == current_user.id,
-            )
-            .first()
+        cached = await _get_cached_content(current_user.id, session_id, "status")
+        if cached:
+            return Response(content=cached, media_type="application/json")
+
+        # Most polls see a non-terminal status, so skip the content blob here
+        session = await _get_user_session(
+            db,
+            session_id,
+            current_user.id,
+            options=[defer(ContentSession.generated_content)],
         )
 
         if not session:
@@ -320,12 +378,12 @@ async def get_content_status(
         }
 
         # Add error messages for rejected/failed sessions
-        if session.status.value == "FAILED":
+        if session.status == ContentStatus.FAILED:
             response_data["error_message"] = (
                 session.moderation_notes or "Content generation failed"
             )
 
-        elif session.status.value == "REJECTED":
+        elif session.status == ContentStatus.REJECTED:
             error_msg = (
                 session.moderation_notes or "Content was rejected by safety filters"
             )
@@ -342,57 +400,42 @@ async def get_content_status(
                 response_data["error_message"] = error_msg
 
         # FIXED: Include content directly in status response when completed
-        elif session.status.value == "COMPLETED" and session.generated_content:
-            try:
-                from app.auth import field_encryption
+        elif session.status == ContentStatus.COMPLETED:
+            generated_content = await db.scalar(
+                select(ContentSession.generated_content).where(
+                    ContentSession.id == session.id
+                )
+            )
 
-                # FIXED: Same decryption logic as above
-                decrypted_content = field_encryption.decrypt(session.generated_content)
+            if generated_content:
+                try:
+                    content_json = await asyncio.to_thread(
+                        field_encryption.decrypt_bytes, generated_content
+                    )
 
-                if isinstance(decrypted_content, bytes):
-                    content_text = decrypted_content.decode("utf-8")
-                elif isinstance(decrypted_content, str):
-                    content_text = decrypted_content
-                else:
-                    logger.error(
-                        f"Unexpected decrypted content type in status: {type(decrypted_content)}"
+                    # Embed the stored JSON with metadata spliced in, unparsed
+                    response_data["content"] = orjson.Fragment(
+                        _merge_metadata(
+                            content_json, _session_metadata(session_id, session)
+                        )
+                    )
+                    logger.info(
+                        f"✅ Content included in status response for session {session_id}"
                     )
-                    content_text = str(decrypted_content)
-
-                content_dict = json.loads(content_text)
-
-                # Add session metadata to the content
-                content_dict.update(
-                    {
-                        "session_id": session_id,
-                        "content_type": session.content_type.value,
-                        "age_group": session.age_group,
-                        "language": session.language,
-                        "topic": session.topic,
-                        "difficulty_level": session.difficulty_level,
-                        "credits_used": session.credits_cost,
-                        "generation_time": session.generation_duration_seconds,
-                        "safety_approved": session.safety_approved,
-                        "parent_approved": session.parent_approved,
-                        "created_at": session.created_at.isoformat(),
-                        "expires_at": session.expires_at.isoformat()
-                        if session.expires_at
-                        else None,
-                    }
-                )
 
-                response_data["content"] = content_dict
-                logger.info(
-                    f"✅ Content included in status response for session {session_id}"
-                )
+                except Exception as e:
+                    logger.error(
+                        f"Failed to include content in status for session {session_id}: {str(e)}"
+                    )
+                    response_data["error_message"] = (
+                        "Content was generated but couldn't be loaded"
+                    )
 
-            except Exception as e:
-                logger.error(
-                    f"Failed to include content in status for session {session_id}: {str(e)}"
-                )
-                response_data["error_message"] = (
-                    "Content was generated but couldn't be loaded"
-                )
+        # Completed content no longer changes until approval or regeneration
+        if "content" in response_data:
+            payload = orjson.dumps(response_data)
+            await _cache_content(current_user.id, session_id, "status", payload)
+            return Response(content=payload, media_type="application/json")
 
         return response_data
 
@@ -403,14 +446,124 @@ async def get_content_status(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/events/{session_id}")
+async def stream_content_events(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Stream content generation status as Server-Sent Events"""
+    try:
+        session = await _get_user_session(db, session_id, current_user.id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        session_pk = session.id
+        current_status = session.status
+    finally:
+        # Don't hold a DB connection for the lifetime of the stream
+        await db.close()
+
+    if current_status not in (ContentStatus.PENDING, ContentStatus.PROCESSING):
+        status_event = orjson.dumps({"status": current_status.value.lower()})
+        return StreamingResponse(
+            iter([b"data: " + status_event + b"\n\n"]),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+
+    # Each stream pins a subscription connection; past the cap, clients fall
+    # back to polling /status
+    if _event_stream_slots.locked():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams, poll /status instead",
+            headers={"Retry-After": str(CONTENT_EVENTS_KEEPALIVE)},
+        )
+
+    async def event_stream():
+        # Everything that holds a connection lives in here: a generator that
+        # is never iterated (client gone before the first chunk) acquires nothing
+        async with _event_stream_slots:
+            channel = f"session:{session_pk}"
+            pubsub = async_redis_pubsub_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(channel)
+
+                # Re-read the status now that we're subscribed, so a completion
+                # published before the subscription isn't missed
+                async with AsyncSessionLocal() as stream_db:
+                    latest_status = await stream_db.scalar(
+                        select(ContentSession.status).where(
+                            ContentSession.id == session_pk
+                        )
+                    )
+                if latest_status not in (
+                    ContentStatus.PENDING,
+                    ContentStatus.PROCESSING,
+                ):
+                    # None: the session was deleted since the handler read it
+                    if latest_status is not None:
+                        status_event = orjson.dumps(
+                            {"status": latest_status.value.lower()}
+                        )
+                        yield b"data: " + status_event + b"\n\n"
+                    return
+
+                deadline = time.monotonic() + CONTENT_EVENTS_TIMEOUT
+                while time.monotonic() < deadline:
+                    message = await pubsub.get_message(
+                        timeout=CONTENT_EVENTS_KEEPALIVE
+                    )
+                    if message is None:
+                        yield b": keepalive\n\n"
+                        continue
+                    yield f"data: {message['data']}\n\n".encode()
+                    try:
+                        event_status = orjson.loads(message["data"]).get("status")
+                    except (orjson.JSONDecodeError, AttributeError):
+                        event_status = None
+                    if event_status in FINAL_EVENT_STATUSES:
+                        return
+            finally:
+                await pubsub.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.get("/debug/image-config")
 async def debug_image_config(
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
 ):
     """Debug image generation configuration"""
-    from app.config import settings
+    # Check if OpenAI is available
+    openai_available = False
+    openai_error = None
+    try:
+        import openai
+
+        openai_available = True
+    except ImportError as e:
+        openai_error = str(e)
+
+    # Check if enhanced service is available
+    enhanced_service_available = False
+    enhanced_error = None
+    try:
+        from app.image_service import EnhancedClaudeWithImages
+
+        enhanced_service_available = True
+    except ImportError as e:
+        enhanced_error = str(e)
 
     return {
+        "openai_available": openai_available,
+        "openai_error": openai_error,
+        "enhanced_service_available": enhanced_service_available,
+        "enhanced_service_error": enhanced_error,
         "image_generation_enabled": settings.IMAGE_GENERATION_ENABLED,
         "image_service": settings.IMAGE_SERVICE,
         "openai_api_key_configured": bool(
@@ -424,26 +577,117 @@ async def debug_image_config(
             "image_quality": settings.IMAGE_QUALITY,
             "style_preset": settings.IMAGE_STYLE_PRESET,
         },
+        "current_config": {
+            "IMAGE_GENERATION_ENABLED": settings.IMAGE_GENERATION_ENABLED,
+            "IMAGE_SERVICE": settings.IMAGE_SERVICE,
+            "OPENAI_API_KEY": "***" + settings.OPENAI_API_KEY[-4:]
+            if settings.OPENAI_API_KEY
+            else "Not set",
+        },
     }
 
 
+@router.get("/debug/rate-limit")
+async def debug_rate_limit(
+    detail: bool = False,
+    tier_overview: bool = False,
+    current_user: User = Depends(get_current_active_user_async),
+):
+    """Debug rate limiting status"""
+    try:
+        user_id = str(current_user.id)
+        tier = current_user.tier.value
+        tier_config = RATE_LIMITS.get(tier, {})
+
+        # Get all rate limit types for this tier
+        debug_info = {
+            "user_id": user_id,
+            "tier": tier,
+            "rate_limits_config": tier_config,
+            "current_usage": {},
+        }
+
+        tier_limits = list(tier_config.items())
+        now = time.time()
+
+        # Queue every limit type plus a ping into one round-trip
+        pipe = rate_limiter.redis.client.pipeline(transaction=False)
+        for limit_type, (_, window_seconds) in tier_limits:
+            rate_limiter.queue_usage_debug(
+                pipe, user_id, limit_type, tier, window_seconds, now, detail
+            )
+        pipe.ping()
+
+        try:
+            start_time = time.time()
+            results = await pipe.execute(raise_on_error=False)
+            redis_latency = time.time() - start_time
+        except Exception as redis_error:
+            debug_info["current_usage"] = {
+                limit_type: {
+                    "error": str(redis_error),
+                    "redis_key": rate_limiter.usage_key(
+                        tier, limit_type, user_id, window_seconds, now
+                    ),
+                }
+                for limit_type, (_, window_seconds) in tier_limits
+            }
+            debug_info["redis_status"] = {"connected": False, "error": str(redis_error)}
+            return debug_info
+
+        # Commands that failed come back as exception instances
+        results = iter(results)
+        for limit_type, (max_requests, window_seconds) in tier_limits:
+            usage = rate_limiter.parse_usage_debug(
+                results, user_id, limit_type, tier, window_seconds, now, detail
+            )
+            if "error" not in usage:
+                usage = {
+                    "limit": max_requests,
+                    "window_seconds": window_seconds,
+                    **usage,
+                    "is_over_limit": usage["valid_entries"] >= max_requests,
+                }
+            debug_info["current_usage"][limit_type] = usage
+
+        pong = next(results)
+        if isinstance(pong, Exception):
+            debug_info["redis_status"] = {"connected": False, "error": str(pong)}
+        else:
+            debug_info["redis_status"] = {
+                "connected": True,
+                "latency_ms": round(redis_latency * 1000, 2),
+            }
+
+        if tier_overview:
+            try:
+                debug_info["tier_overview"] = await rate_limiter.get_tier_overview(
+                    tier
+                )
+            except Exception as redis_error:
+                debug_info["tier_overview"] = {"error": str(redis_error)}
+
+        return debug_info
+
+    except Exception as e:
+        logger.error(f"Rate limit debug failed: {e}")
+        return {
+            "error": str(e),
+            "user_id": str(current_user.id),
+            "tier": current_user.tier.value,
+        }
+
+
 # DEBUGGING: Add this endpoint to see what's in the database
 @router.get("/debug/{session_id}")
 async def debug_session_detailed(
     session_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Debug endpoint to see exactly what's in the database"""
     try:
-        session = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.id == session_id,
-                ContentSession.user_id == current_user.id,
-            )
-            .first()
-        )
+        session = await _get_user_session(db, session_id, current_user.id)
 
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -472,10 +716,10 @@ async def debug_session_detailed(
         # Try to preview content if it exists
         if session.generated_content:
             try:
-                from app.auth import field_encryption
-
-                decrypted = field_encryption.decrypt(session.generated_content)
-                content_text = decrypted.decode("utf-8")
+                decrypted = await asyncio.to_thread(
+                    field_encryption.decrypt, session.generated_content
+                )
+                content_text = decrypted
 
                 # Show first 200 characters
                 debug_info["content_preview"] = (
@@ -485,7 +729,7 @@ async def debug_session_detailed(
                 )
 
                 # Try to parse as JSON
-                content_dict = json.loads(content_text)
+                content_dict = orjson.loads(content_text)
                 debug_info["content_structure"] = {
                     "keys": list(content_dict.keys()),
                     "title": content_dict.get("title"),
@@ -505,110 +749,66 @@ async def debug_session_detailed(
         raise HTTPException(status_code=500, detail=f"Debug failed: {str(e)}")
 
 
-# Add this to your content.py router for debugging
-
-
-@router.get("/debug/image-config")
-async def debug_image_config(
-    current_user: User = Depends(get_current_active_user),
-):
-    """Debug image generation configuration"""
-    from app.config import settings
-
-    # Check if OpenAI is available
-    openai_available = False
-    openai_error = None
-    try:
-        import openai
-
-        openai_available = True
-    except ImportError as e:
-        openai_error = str(e)
-
-    # Check if enhanced service is available
-    enhanced_service_available = False
-    enhanced_error = None
-    try:
-        from app.image_service import EnhancedClaudeWithImages
-
-        enhanced_service_available = True
-    except ImportError as e:
-        enhanced_error = str(e)
-
-    return {
-        "openai_available": openai_available,
-        "openai_error": openai_error,
-        "enhanced_service_available": enhanced_service_available,
-        "enhanced_service_error": enhanced_error,
-        "image_generation_enabled": settings.IMAGE_GENERATION_ENABLED,
-        "image_service": settings.IMAGE_SERVICE,
-        "openai_api_key_configured": bool(
-            settings.OPENAI_API_KEY
-            and settings.OPENAI_API_KEY != "your-openai-api-key-here"
-        ),
-        "images_enabled_property": settings.images_enabled,
-        "image_settings": {
-            "max_images_per_story": settings.MAX_IMAGES_PER_STORY,
-            "image_size": settings.IMAGE_SIZE,
-            "image_quality": settings.IMAGE_QUALITY,
-            "style_preset": settings.IMAGE_STYLE_PRESET,
-        },
-        "current_config": {
-            "IMAGE_GENERATION_ENABLED": settings.IMAGE_GENERATION_ENABLED,
-            "IMAGE_SERVICE": settings.IMAGE_SERVICE,
-            "OPENAI_API_KEY": "***" + settings.OPENAI_API_KEY[-4:]
-            if settings.OPENAI_API_KEY
-            else "Not set",
-        },
-    }
-
-
 @router.post("/{session_id}/approve", response_model=SuccessResponse)
 async def approve_content(
     session_id: str,
     approval: ContentApproval,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Approve or reject generated content"""
     try:
-        session = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.id == session_id,
-                ContentSession.user_id == current_user.id,
-                ContentSession.status == ContentStatus.COMPLETED,
-            )
-            .first()
+        not_found = HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Content session not found or not ready for approval",
         )
 
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Content session not found or not ready for approval",
-            )
+        session_pk = _parse_session_id(session_id)
+        if session_pk is None:
+            raise not_found
 
         # Update approval status
-        session.parent_approved = approval.approved
-
+        values = {
+            "parent_approved": approval.approved,
+            "status": ContentStatus.APPROVED
+            if approval.approved
+            else ContentStatus.REJECTED,
+        }
         if approval.feedback:
-            existing_notes = session.moderation_notes or ""
-            session.moderation_notes = (
-                f"{existing_notes}\nParent feedback: {approval.feedback}"
+            values["moderation_notes"] = func.concat(
+                func.coalesce(ContentSession.moderation_notes, ""),
+                f"\nParent feedback: {approval.feedback}",
             )
 
-        if approval.approved:
-            session.status = ContentStatus.APPROVED
-
-            # Update child's last_used timestamp if child specified
-            if session.child_id:
-                child = db.query(Child).filter(Child.id == session.child_id).first()
-                if child:
-                    child.last_used = datetime.utcnow()
-        else:
-            session.status = ContentStatus.REJECTED
+        # Ownership and readiness are part of the UPDATE's WHERE clause
+        stmt = (
+            update(ContentSession)
+            .where(
+                ContentSession.id == session_pk,
+                ContentSession.user_id == current_user.id,
+                ContentSession.status == ContentStatus.COMPLETED,
+            )
+            .values(**values)
+            .returning(ContentSession.child_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = (await db.execute(stmt)).one_or_none()
+
+        if result is None:
+            raise not_found
+
+        # Update child's last_used timestamp if child specified
+        if approval.approved and result.child_id:
+            await db.execute(
+                update(Child)
+                .where(Child.id == result.child_id)
+                .values(last_used=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
 
-        db.commit()
+        await db.commit()
+        await _invalidate_content_cache(current_user.id, session_id)
+        await invalidate_dashboard_cache(current_user.id)
 
         status_text = "approved" if approval.approved else "rejected"
         logger.info(f"Content {status_text} by parent for session {session_id}")
@@ -619,90 +819,29 @@ async def approve_content(
         raise
     except Exception as e:
         logger.error(f"Content approval failed: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process content approval",
         )
 
 
-@router.get("/debug/{session_id}")
-async def debug_content_session(
-    session_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
-):
-    """Debug endpoint to check content session details"""
-    try:
-        session = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.id == session_id,
-                ContentSession.user_id == current_user.id,
-            )
-            .first()
-        )
-
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Content session not found",
-            )
-
-        return {
-            "session_id": str(session.id),
-            "user_id": str(session.user_id),
-            "status": session.status.value,
-            "parent_approved": session.parent_approved,
-            "safety_approved": session.safety_approved,
-            "generated_title": session.generated_title,
-            "has_generated_content": session.generated_content is not None,
-            "content_length": len(session.generated_content)
-            if session.generated_content
-            else 0,
-            "content_metadata": session.content_metadata,
-            "topic": session.topic,
-            "age_group": session.age_group,
-            "language": session.language,
-            "credits_cost": session.credits_cost,
-            "credits_charged": session.credits_charged,
-            "created_at": session.created_at.isoformat(),
-            "generation_started_at": session.generation_started_at.isoformat()
-            if session.generation_started_at
-            else None,
-            "generation_completed_at": session.generation_completed_at.isoformat()
-            if session.generation_completed_at
-            else None,
-            "expires_at": session.expires_at.isoformat(),
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Debug content session failed: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to debug content session",
-        )
-
-
 @router.post("/{session_id}/regenerate", response_model=ContentResponse)
 @rate_limit("content")
 async def regenerate_content(
     session_id: str,
     regenerate_request: ContentRegenerate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Regenerate content with feedback"""
     try:
-        session = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.id == session_id,
-                ContentSession.user_id == current_user.id,
-            )
-            .first()
+        # The old content is discarded, so don't ship it from the database
+        session = await _get_user_session(
+            db,
+            session_id,
+            current_user.id,
+            options=[defer(ContentSession.generated_content)],
         )
 
         if not session:
@@ -752,16 +891,16 @@ async def regenerate_content(
         session.generation_completed_at = None
         session.credits_charged = False
 
-        # Update metadata
-        metadata = session.content_metadata.copy()
-        metadata["regeneration_count"] = regeneration_count + 1
-        metadata["last_regeneration"] = datetime.utcnow().isoformat()
-        session.content_metadata = metadata
+        # Update metadata in place; MutableDict flags the column as changed
+        session.content_metadata["regeneration_count"] = regeneration_count + 1
+        session.content_metadata["last_regeneration"] = datetime.utcnow().isoformat()
 
-        db.commit()
+        await db.commit()
+        await _invalidate_content_cache(current_user.id, session_id)
+        await invalidate_dashboard_cache(current_user.id)
 
         # Queue new generation task
-        task = generate_content_task.delay(str(session.id))
+        enqueue_content_generation(str(session.id), session.include_images)
 
         logger.info(f"Content regeneration queued for session {session_id}")
 
@@ -776,7 +915,7 @@ async def regenerate_content(
         raise
     except Exception as e:
         logger.error(f"Content regeneration failed: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to regenerate content",
@@ -785,46 +924,56 @@ async def regenerate_content(
 
 @router.get("/history", response_model=List[ContentHistory])
 async def get_content_history(
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_async),
     pagination: PaginationParams = Depends(),
     filters: FilterParams = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get content generation history"""
     try:
         # Build query
-        query = db.query(ContentSession).filter(
-            ContentSession.user_id == current_user.id
-        )
+        stmt = select(ContentSession).where(ContentSession.user_id == current_user.id)
 
         # Apply filters
         if filters.language:
-            query = query.filter(ContentSession.language == filters.language)
+            stmt = stmt.where(ContentSession.language == filters.language)
         if filters.content_type:
-            query = query.filter(ContentSession.content_type == filters.content_type)
+            stmt = stmt.where(ContentSession.content_type == filters.content_type)
         if filters.age_group:
-            query = query.filter(ContentSession.age_group == filters.age_group)
+            stmt = stmt.where(ContentSession.age_group == filters.age_group)
         if filters.date_from:
-            query = query.filter(ContentSession.created_at >= filters.date_from)
+            stmt = stmt.where(ContentSession.created_at >= filters.date_from)
         if filters.date_to:
-            query = query.filter(ContentSession.created_at <= filters.date_to)
+            stmt = stmt.where(ContentSession.created_at <= filters.date_to)
 
-        # Get paginated results
-        content_sessions = (
-            query.order_by(ContentSession.created_at.desc())
+        # Get paginated results, loading each page's children in one extra query
+        stmt = (
+            stmt.options(selectinload(ContentSession.child))
+            .order_by(ContentSession.created_at.desc())
             .offset(pagination.offset)
             .limit(pagination.per_page)
-            .all()
+        )
+        content_sessions = (await db.execute(stmt)).scalars().all()
+
+        # Decrypt each child's nickname once, off the event loop
+        children = {
+            session.child.id: session.child.nickname_encrypted
+            for session in content_sessions
+            if session.child and session.child.nickname_encrypted
+        }
+        child_names = dict(
+            zip(
+                children,
+                await asyncio.to_thread(
+                    field_encryption.decrypt_many, list(children.values())
+                ),
+            )
         )
 
         # Build response
         history = []
         for session in content_sessions:
-            child_name = None
-            if session.child_id:
-                child = db.query(Child).filter(Child.id == session.child_id).first()
-                if child and child.nickname_encrypted:
-                    child_name = field_encryption.decrypt(child.nickname_encrypted)
+            child_name = child_names.get(session.child_id)
 
             history.append(
                 ContentHistory(
@@ -855,32 +1004,42 @@ async def get_content_history(
 @router.delete("/{session_id}", response_model=SuccessResponse)
 async def delete_content(
     session_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete content session"""
     try:
-        session = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.id == session_id,
-                ContentSession.user_id == current_user.id,
-            )
-            .first()
+        not_found = HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Content session not found",
         )
 
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Content session not found",
-            )
+        session_pk = _parse_session_id(session_id)
+        if session_pk is None:
+            raise not_found
 
-        # Clear content data but keep session record for analytics
-        session.generated_content = None
-        session.content_metadata = {}
-        session.status = ContentStatus.PENDING  # Mark as cleaned
+        # Clear content data but keep session record for analytics; the
+        # ownership check is part of the UPDATE's WHERE clause
+        stmt = (
+            update(ContentSession)
+            .where(
+                ContentSession.id == session_pk,
+                ContentSession.user_id == current_user.id,
+            )
+            .values(
+                generated_content=None,
+                content_metadata={},
+                status=ContentStatus.PENDING,  # Mark as cleaned
+            )
+            .returning(ContentSession.id)
+            .execution_options(synchronize_session=False)
+        )
+        if (await db.execute(stmt)).one_or_none() is None:
+            raise not_found
 
-        db.commit()
+        await db.commit()
+        await _invalidate_content_cache(current_user.id, session_id)
+        await invalidate_dashboard_cache(current_user.id)
 
         logger.info(f"Content deleted for session {session_id}")
 
@@ -890,97 +1049,8 @@ async def delete_content(
         raise
     except Exception as e:
         logger.error(f"Content deletion failed: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete content",
         )
-
-
-@router.get("/debug/rate-limit")
-async def debug_rate_limit(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
-):
-    """Debug rate limiting status"""
-    try:
-        from ..rate_limiter import rate_limiter, RATE_LIMITS
-
-        user_id = str(current_user.id)
-        tier = current_user.tier.value
-
-        # Get all rate limit types for this tier
-        debug_info = {
-            "user_id": user_id,
-            "tier": tier,
-            "rate_limits_config": RATE_LIMITS.get(tier, {}),
-            "current_usage": {},
-        }
-
-        # Check each rate limit type
-        for limit_type in RATE_LIMITS.get(tier, {}):
-            max_requests, window_seconds = RATE_LIMITS[tier][limit_type]
-
-            # Get Redis key and check current state
-            key = f"rate_limit:{tier}:{limit_type}:{user_id}"
-
-            try:
-                # Check Redis directly
-                import time
-
-                now = time.time()
-
-                # Get all entries in the key
-                all_entries = await rate_limiter.redis.zrange(
-                    key, 0, -1, withscores=True
-                )
-
-                # Count entries in current window
-                valid_entries = [
-                    entry for entry in all_entries if entry[1] > now - window_seconds
-                ]
-
-                debug_info["current_usage"][limit_type] = {
-                    "limit": max_requests,
-                    "window_seconds": window_seconds,
-                    "redis_key": key,
-                    "total_entries": len(all_entries),
-                    "valid_entries": len(valid_entries),
-                    "entries_detail": [
-                        {
-                            "timestamp": entry[1],
-                            "age_seconds": now - entry[1],
-                            "is_valid": entry[1] > now - window_seconds,
-                        }
-                        for entry in all_entries
-                    ],
-                    "is_over_limit": len(valid_entries) >= max_requests,
-                }
-
-            except Exception as redis_error:
-                debug_info["current_usage"][limit_type] = {
-                    "error": str(redis_error),
-                    "redis_key": key,
-                }
-
-        # Also test Redis connectivity
-        try:
-            start_time = time.time()
-            await rate_limiter.redis.ping()
-            redis_latency = time.time() - start_time
-            debug_info["redis_status"] = {
-                "connected": True,
-                "latency_ms": round(redis_latency * 1000, 2),
-            }
-        except Exception as redis_error:
-            debug_info["redis_status"] = {"connected": False, "error": str(redis_error)}
-
-        return debug_info
-
-    except Exception as e:
-        logger.error(f"Rate limit debug failed: {e}")
-        return {
-            "error": str(e),
-            "user_id": str(current_user.id),
-            "tier": current_user.tier.value,
-        }
@@ -3,11 +3,13 @@ Kiddos - Credits Router
 Credit management, packages, and transactions
 """
 
+import asyncio
 import logging
 from typing import List, Dict
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 import stripe
 
 from ..database import get_db
@@ -24,48 +26,103 @@ logger = logging.getLogger(__name__)
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 # Create router
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Columns needed to render a TransactionHistory entry
+TRANSACTION_HISTORY_COLUMNS = (
+    CreditTransaction.id,
+    CreditTransaction.transaction_type,
+    CreditTransaction.amount,
+    CreditTransaction.cost_usd,
+    CreditTransaction.description,
+    CreditTransaction.status,
+    CreditTransaction.created_at,
+)
+
+
+def _transaction_history(
+    db: Session, user_id, limit: int
+) -> List[TransactionHistory]:
+    """Load a user's most recent transactions as plain rows"""
+    rows = db.execute(
+        select(*TRANSACTION_HISTORY_COLUMNS)
+        .where(CreditTransaction.user_id == user_id)
+        .order_by(CreditTransaction.created_at.desc())
+        .limit(limit)
+    ).all()
+
+    return [
+        TransactionHistory(
+            id=str(row.id),
+            transaction_type=row.transaction_type,
+            amount=row.amount,
+            cost_usd=row.cost_usd / 100 if row.cost_usd else None,
+            description=row.description,
+            status=row.status,
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
+
+
+# Packages are static, so they are built once at import time
+CREDIT_PACKAGES = [
+    CreditPackage(
+        package_type="mini",
+        credits=30,
+        price_usd=2.99,
+        bonus_credits=0,
+        description="Perfect for trying out Kiddos",
+        popular=False,
+    ),
+    CreditPackage(
+        package_type="basic",
+        credits=100,
+        price_usd=7.99,
+        bonus_credits=10,
+        description="Great for regular use",
+        popular=True,
+    ),
+    CreditPackage(
+        package_type="family",
+        credits=250,
+        price_usd=17.99,
+        bonus_credits=50,
+        description="Best value for families",
+        popular=False,
+    ),
+    CreditPackage(
+        package_type="bulk",
+        credits=500,
+        price_usd=29.99,
+        bonus_credits=150,
+        description="For heavy users and educators",
+        popular=False,
+    ),
+]
+CREDIT_PACKAGES_BY_TYPE = {p.package_type: p for p in CREDIT_PACKAGES}
+
+# Stripe checkout line item for each package, amounts in cents
+STRIPE_LINE_ITEMS = {
+    p.package_type: {
+        "price_data": {
+            "currency": "usd",
+            "product_data": {
+                "name": f"Kiddos Credits - {p.credits + p.bonus_credits} credits",
+                "description": p.description,
+            },
+            "unit_amount": round(p.price_usd * 100),
+        },
+        "quantity": 1,
+    }
+    for p in CREDIT_PACKAGES
+}
 
 
 @router.get("/packages", response_model=List[CreditPackage])
 async def get_credit_packages():
     """Get available credit packages"""
-    packages = [
-        CreditPackage(
-            package_type="mini",
-            credits=30,
-            price_usd=2.99,
-            bonus_credits=0,
-            description="Perfect for trying out Kiddos",
-            popular=False,
-        ),
-        CreditPackage(
-            package_type="basic",
-            credits=100,
-            price_usd=7.99,
-            bonus_credits=10,
-            description="Great for regular use",
-            popular=True,
-        ),
-        CreditPackage(
-            package_type="family",
-            credits=250,
-            price_usd=17.99,
-            bonus_credits=50,
-            description="Best value for families",
-            popular=False,
-        ),
-        CreditPackage(
-            package_type="bulk",
-            credits=500,
-            price_usd=29.99,
-            bonus_credits=150,
-            description="For heavy users and educators",
-            popular=False,
-        ),
-    ]
-
-    return packages
+    return CREDIT_PACKAGES
 
 
 @router.post("/purchase", response_model=Dict[str, str])
@@ -78,11 +135,7 @@ async def purchase_credits(
     """Initiate credit purchase"""
     try:
         # Get package details
-        packages = await get_credit_packages()
-        package = next(
-            (p for p in packages if p.package_type == purchase_request.package_type),
-            None,
-        )
+        package = CREDIT_PACKAGES_BY_TYPE.get(purchase_request.package_type)
 
         if not package:
             raise HTTPException(
@@ -91,23 +144,11 @@ async def purchase_credits(
 
         # Create Stripe checkout session
         try:
-            checkout_session = stripe.checkout.Session.create(
+            # The Stripe client is blocking, so keep it off the event loop
+            checkout_session = await asyncio.to_thread(
+                stripe.checkout.Session.create,
                 payment_method_types=["card"],
-                line_items=[
-                    {
-                        "price_data": {
-                            "currency": "usd",
-                            "product_data": {
-                                "name": f"Kiddos Credits - {package.credits + package.bonus_credits} credits",
-                                "description": package.description,
-                            },
-                            "unit_amount": int(
-                                package.price_usd * 100
-                            ),  # Convert to cents
-                        },
-                        "quantity": 1,
-                    }
-                ],
+                line_items=[STRIPE_LINE_ITEMS[package.package_type]],
                 mode="payment",
                 success_url=f"https://kiddos.app/payment/success?session_id={{CHECKOUT_SESSION_ID}}",
                 cancel_url="https://kiddos.app/payment/cancel",
@@ -146,60 +187,38 @@ async def get_credit_balance(
 ):
     """Get user credit balance and history"""
     try:
-        # Calculate totals
-        purchases = (
-            db.query(func.sum(CreditTransaction.amount))
-            .filter(
-                CreditTransaction.user_id == current_user.id,
-                CreditTransaction.transaction_type == TransactionType.PURCHASE,
-                CreditTransaction.status == "completed",
-            )
-            .scalar()
-            or 0
-        )
-
-        spent = abs(
-            db.query(func.sum(CreditTransaction.amount))
-            .filter(
-                CreditTransaction.user_id == current_user.id,
-                CreditTransaction.transaction_type == TransactionType.CONSUMPTION,
-                CreditTransaction.status == "completed",
-            )
-            .scalar()
-            or 0
-        )
-
-        pending = (
-            db.query(func.count(CreditTransaction.id))
-            .filter(
-                CreditTransaction.user_id == current_user.id,
-                CreditTransaction.status == "pending",
+        # Calculate totals in one pass over the user's transactions
+        completed = CreditTransaction.status == "completed"
+        totals = (
+            db.query(
+                func.coalesce(
+                    func.sum(CreditTransaction.amount).filter(
+                        CreditTransaction.transaction_type == TransactionType.PURCHASE,
+                        completed,
+                    ),
+                    0,
+                ).label("purchases"),
+                func.coalesce(
+                    func.sum(CreditTransaction.amount).filter(
+                        CreditTransaction.transaction_type
+                        == TransactionType.CONSUMPTION,
+                        completed,
+                    ),
+                    0,
+                ).label("spent"),
+                func.count()
+                .filter(CreditTransaction.status == "pending")
+                .label("pending"),
             )
-            .scalar()
-            or 0
-        )
-
-        # Get recent transactions
-        recent_transactions = (
-            db.query(CreditTransaction)
             .filter(CreditTransaction.user_id == current_user.id)
-            .order_by(CreditTransaction.created_at.desc())
-            .limit(10)
-            .all()
+            .one()
         )
+        purchases = totals.purchases
+        spent = abs(totals.spent)
+        pending = totals.pending
 
-        transaction_history = [
-            TransactionHistory(
-                id=str(tx.id),
-                transaction_type=tx.transaction_type,
-                amount=tx.amount,
-                cost_usd=tx.cost_usd / 100 if tx.cost_usd else None,
-                description=tx.description,
-                status=tx.status,
-                created_at=tx.created_at,
-            )
-            for tx in recent_transactions
-        ]
+        # Get recent transactions
+        transaction_history = _transaction_history(db, current_user.id, 10)
 
         return CreditBalance(
             current_balance=current_user.credits,
@@ -225,26 +244,7 @@ async def get_transaction_history(
 ):
     """Get detailed transaction history"""
     try:
-        transactions = (
-            db.query(CreditTransaction)
-            .filter(CreditTransaction.user_id == current_user.id)
-            .order_by(CreditTransaction.created_at.desc())
-            .limit(limit)
-            .all()
-        )
-
-        return [
-            TransactionHistory(
-                id=str(tx.id),
-                transaction_type=tx.transaction_type,
-                amount=tx.amount,
-                cost_usd=tx.cost_usd / 100 if tx.cost_usd else None,
-                description=tx.description,
-                status=tx.status,
-                created_at=tx.created_at,
-            )
-            for tx in transactions
-        ]
+        return _transaction_history(db, current_user.id, limit)
 
     except Exception as e:
         logger.error(f"Get transaction history failed: {e}")
@@ -3,14 +3,18 @@ Kiddos - Dashboard Router
 Parent dashboard, analytics, and usage statistics
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends, status
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, distinct, func, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
-from ..database import get_db
+from ..database import get_db, redis_manager
 from ..schemas import DashboardStats, UsageAnalytics
 from ..auth import get_current_active_user, field_encryption
 from ..models import (
@@ -26,7 +30,23 @@ from ..models import (
 logger = logging.getLogger(__name__)
 
 # Create router
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Seconds dashboard responses stay cached
+DASHBOARD_CACHE_TTL = 45
+
+
+# Response cache: one Redis hash per user ("stats", "summary", "insights",
+# "analytics:<days>"), so a single DEL invalidates every dashboard view.
+# Credits and tier are read live from the user and never served from cache.
+def _dashboard_cache_key(user_id) -> str:
+    """Cache hash holding a user's dashboard responses"""
+    return f"dashboard:{user_id}"
+
+
+async def invalidate_dashboard_cache(user_id) -> None:
+    """Drop every cached dashboard response for a user"""
+    await redis_manager.delete(_dashboard_cache_key(user_id))
 
 
 @router.get("", response_model=DashboardStats)
@@ -35,82 +55,138 @@ async def get_dashboard(
 ):
     """Get parent dashboard statistics"""
     try:
-        # Children count
-        children_count = (
-            db.query(Child)
-            .filter(Child.user_id == current_user.id, Child.is_active == True)
-            .count()
+        cached = await redis_manager.hget_cached(
+            _dashboard_cache_key(current_user.id), "stats"
         )
-
-        # Total content generated
-        total_content = (
-            db.query(ContentSession)
-            .filter(
-                ContentSession.user_id == current_user.id,
-                ContentSession.status == ContentStatus.COMPLETED,
+        if cached:
+            return DashboardStats.model_validate_json(cached).model_copy(
+                update={
+                    "credits_remaining": current_user.credits,
+                    "tier": current_user.tier,
+                }
             )
-            .count()
-        )
 
-        # Content this week
         week_ago = datetime.utcnow() - timedelta(days=7)
-        content_this_week = (
-            db.query(ContentSession)
-            .filter(
+
+        # Every figure is computed by one statement built from CTEs
+        kids = (
+            select(func.count().label("count"))
+            .where(Child.user_id == current_user.id, Child.is_active == True)
+            .cte("kids")
+        )
+
+        # Completed sessions are scanned once and shared by the CTEs below
+        completed = (
+            select(ContentSession.topic, ContentSession.created_at)
+            .where(
                 ContentSession.user_id == current_user.id,
                 ContentSession.status == ContentStatus.COMPLETED,
-                ContentSession.created_at >= week_ago,
             )
-            .count()
+            .cte("completed")
         )
 
-        # Favorite topics (top 5)
-        topic_stats = (
-            db.query(ContentSession.topic, func.count(ContentSession.id).label("count"))
-            .filter(
-                ContentSession.user_id == current_user.id,
-                ContentSession.status == ContentStatus.COMPLETED,
+        content = (
+            select(
+                func.count().label("total"),
+                func.count()
+                .filter(completed.c.created_at >= week_ago)
+                .label("this_week"),
             )
-            .group_by(ContentSession.topic)
-            .order_by(func.count(ContentSession.id).desc())
-            .limit(5)
-            .all()
+            .select_from(completed)
+            .cte("content")
         )
 
-        favorite_topics = [
-            {"topic": topic, "count": count} for topic, count in topic_stats
-        ]
+        topics = (
+            select(completed.c.topic, func.count().label("count"))
+            .group_by(completed.c.topic)
+            .order_by(func.count().desc())
+            .limit(5)
+            .cte("topics")
+        )
 
-        # Usage by child
-        child_usage = (
-            db.query(
-                Child.nickname_encrypted,
-                func.count(ContentSession.id).label("content_count"),
+        usage = (
+            select(
+                Child.id,
+                func.encode(Child.nickname_encrypted, "hex").label("nickname"),
+                func.count(ContentSession.id).label("count"),
             )
             .join(ContentSession, Child.id == ContentSession.child_id, isouter=True)
-            .filter(Child.user_id == current_user.id, Child.is_active == True)
+            .where(Child.user_id == current_user.id, Child.is_active == True)
             .group_by(Child.id, Child.nickname_encrypted)
-            .all()
+            .cte("usage")
         )
 
-        usage_by_child = []
-        for nickname_encrypted, count in child_usage:
-            nickname = (
-                field_encryption.decrypt(nickname_encrypted)
-                if nickname_encrypted
-                else "Unknown"
+        topics_json = select(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "topic", topics.c.topic, "count", topics.c.count
+                    ),
+                    topics.c.count.desc(),
+                )
             )
-            usage_by_child.append({"child_name": nickname, "content_count": count or 0})
+        ).scalar_subquery()
 
-        return DashboardStats(
-            children_count=children_count,
-            total_content_generated=total_content,
-            content_this_week=content_this_week,
+        usage_json = select(
+            func.json_agg(
+                func.json_build_object(
+                    "nickname", usage.c.nickname, "count", usage.c.count
+                )
+            )
+        ).scalar_subquery()
+
+        stmt = (
+            select(
+                kids.c.count.label("children_count"),
+                content.c.total,
+                content.c.this_week,
+                topics_json.label("favorite_topics"),
+                usage_json.label("child_usage"),
+            )
+            .select_from(kids)
+            .join(content, true())
+        )
+
+        # Run the blocking query off the event loop
+        stats = (await asyncio.to_thread(db.execute, stmt)).one()
+
+        favorite_topics = stats.favorite_topics or []
+
+        # bytea travels through JSON as hex
+        child_usage = [
+            (
+                bytes.fromhex(row["nickname"]) if row["nickname"] else None,
+                row["count"],
+            )
+            for row in stats.child_usage or []
+        ]
+
+        nicknames = field_encryption.decrypt_many([enc for enc, _ in child_usage])
+        usage_by_child = [
+            {
+                "child_name": nickname if nickname_encrypted else "Unknown",
+                "content_count": count or 0,
+            }
+            for (nickname_encrypted, count), nickname in zip(child_usage, nicknames)
+        ]
+
+        dashboard = DashboardStats(
+            children_count=stats.children_count,
+            total_content_generated=stats.total,
+            content_this_week=stats.this_week,
             favorite_topics=favorite_topics,
             usage_by_child=usage_by_child,
             credits_remaining=current_user.credits,
             tier=current_user.tier,
         )
+        await redis_manager.hset_cached(
+            _dashboard_cache_key(current_user.id),
+            "stats",
+            dashboard.model_dump_json(),
+            DASHBOARD_CACHE_TTL,
+        )
+
+        return dashboard
 
     except Exception as e:
         logger.error(f"Get dashboard failed: {e}")
@@ -128,104 +204,108 @@ async def get_usage_analytics(
 ):
     """Get detailed usage analytics"""
     try:
-        start_date = datetime.utcnow() - timedelta(days=days)
-
-        # Daily usage over time
-        daily_usage = (
-            db.query(
-                func.date(ContentSession.created_at).label("date"),
-                func.count(ContentSession.id).label("count"),
-            )
-            .filter(
-                ContentSession.user_id == current_user.id,
-                ContentSession.status == ContentStatus.COMPLETED,
-                ContentSession.created_at >= start_date,
-            )
-            .group_by(func.date(ContentSession.created_at))
-            .order_by(func.date(ContentSession.created_at))
-            .all()
+        cache_field = f"analytics:{days}"
+        cached = await redis_manager.hget_cached(
+            _dashboard_cache_key(current_user.id), cache_field
         )
+        if cached:
+            return Response(content=cached, media_type="application/json")
 
-        daily_data = [
-            {"date": date.isoformat(), "content_count": count}
-            for date, count in daily_usage
-        ]
+        start_date = datetime.utcnow() - timedelta(days=days)
 
-        # Popular content types
-        content_type_stats = (
-            db.query(
-                ContentSession.content_type,
-                func.count(ContentSession.id).label("count"),
-            )
+        # Users with nothing completed in the window skip the histograms
+        has_content = db.query(
+            db.query(ContentSession.id)
             .filter(
                 ContentSession.user_id == current_user.id,
                 ContentSession.status == ContentStatus.COMPLETED,
                 ContentSession.created_at >= start_date,
             )
-            .group_by(ContentSession.content_type)
-            .all()
-        )
-
-        content_types = [
-            {"content_type": content_type.value, "count": count}
-            for content_type, count in content_type_stats
-        ]
-
-        # Learning progress by child
-        progress_data = []
-        children = (
-            db.query(Child)
-            .filter(Child.user_id == current_user.id, Child.is_active == True)
-            .all()
-        )
-
-        for child in children:
-            child_content = (
-                db.query(ContentSession)
-                .filter(
-                    ContentSession.child_id == child.id,
+            .exists()
+        ).scalar()
+
+        daily_data, content_types, hourly_data = [], [], {}
+        if has_content:
+            # Daily, content-type and hourly counts from one scan via
+            # GROUPING SETS; columns outside a row's set come back NULL
+            day = func.date(ContentSession.created_at)
+            hour = func.extract("hour", ContentSession.created_at)
+            histograms = db.execute(
+                select(
+                    day.label("day"),
+                    ContentSession.content_type,
+                    hour.label("hour"),
+                    func.count().label("count"),
+                )
+                .where(
+                    ContentSession.user_id == current_user.id,
                     ContentSession.status == ContentStatus.COMPLETED,
                     ContentSession.created_at >= start_date,
                 )
-                .count()
-            )
-
-            nickname = (
-                field_encryption.decrypt(child.nickname_encrypted)
-                if child.nickname_encrypted
-                else f"Child {child.age_group}"
+                .group_by(func.grouping_sets(day, ContentSession.content_type, hour))
+            ).all()
+
+            for row in histograms:
+                if row.day is not None:
+                    daily_data.append({"date": row.day, "content_count": row.count})
+                elif row.content_type is not None:
+                    content_types.append(
+                        {"content_type": row.content_type.value, "count": row.count}
+                    )
+                else:
+                    hourly_data[str(int(row.hour))] = row.count
+
+            daily_data.sort(key=lambda entry: entry["date"])
+
+        # Learning progress by child, counted in one grouped query
+        children = db.execute(
+            select(
+                Child.nickname_encrypted,
+                Child.age_group,
+                func.count(ContentSession.id).label("content_count"),
             )
-            progress_data.append(
-                {
-                    "child_name": nickname,
-                    "content_count": child_content,
-                    "age_group": child.age_group,
-                }
+            .select_from(Child)
+            .outerjoin(
+                ContentSession,
+                and_(
+                    ContentSession.child_id == Child.id,
+                    ContentSession.status == ContentStatus.COMPLETED,
+                    ContentSession.created_at >= start_date,
+                ),
             )
+            .where(Child.user_id == current_user.id, Child.is_active == True)
+            .group_by(Child.id)
+        ).all()
 
-        # Time patterns (hour of day)
-        time_patterns = (
-            db.query(
-                func.extract("hour", ContentSession.created_at).label("hour"),
-                func.count(ContentSession.id).label("count"),
-            )
-            .filter(
-                ContentSession.user_id == current_user.id,
-                ContentSession.status == ContentStatus.COMPLETED,
-                ContentSession.created_at >= start_date,
-            )
-            .group_by(func.extract("hour", ContentSession.created_at))
-            .all()
+        nicknames = field_encryption.decrypt_many(
+            [child.nickname_encrypted for child in children]
         )
 
-        hourly_data = {str(int(hour)): count for hour, count in time_patterns}
+        progress_data = [
+            {
+                "child_name": (
+                    nickname if child.nickname_encrypted else f"Child {child.age_group}"
+                ),
+                "content_count": child.content_count,
+                "age_group": child.age_group,
+            }
+            for child, nickname in zip(children, nicknames)
+        ]
 
-        return UsageAnalytics(
+        analytics = UsageAnalytics(
             daily_usage=daily_data,
             popular_content_types=content_types,
             learning_progress=progress_data,
             time_patterns=hourly_data,
         )
+        await redis_manager.hset_cached(
+            _dashboard_cache_key(current_user.id),
+            cache_field,
+            analytics.model_dump_json(),
+            DASHBOARD_CACHE_TTL,
+        )
+
+        return analytics
 
     except Exception as e:
         logger.error(f"Get analytics failed: {e}")
@@ -241,6 +321,15 @@ async def get_summary_stats(
 ):
     """Get quick summary statistics"""
     try:
+        cached = await redis_manager.hget_cached(
+            _dashboard_cache_key(current_user.id), "summary"
+        )
+        if cached:
+            summary = orjson.loads(cached)
+            summary["current_credits"] = current_user.credits
+            summary["tier"] = current_user.tier.value
+            return summary
+
         # Quick stats
         total_content = (
             db.query(ContentSession)
@@ -283,13 +372,13 @@ async def get_summary_stats(
             {
                 "topic": session.topic,
                 "content_type": session.content_type.value,
-                "created_at": session.created_at.isoformat(),
+                "created_at": session.created_at,
                 "age_group": session.age_group,
             }
             for session in recent_content
         ]
 
-        return {
+        summary = {
             "total_content_generated": total_content,
             "total_credits_spent": total_spent,
             "children_count": children_count,
@@ -297,6 +386,14 @@ async def get_summary_stats(
             "tier": current_user.tier.value,
             "recent_activity": recent_activity,
         }
+        await redis_manager.hset_cached(
+            _dashboard_cache_key(current_user.id),
+            "summary",
+            orjson.dumps(summary),
+            DASHBOARD_CACHE_TTL,
+        )
+
+        return summary
 
     except Exception as e:
         logger.error(f"Get summary failed: {e}")
@@ -312,20 +409,41 @@ async def get_insights(
 ):
     """Get personalized insights and recommendations"""
     try:
+        cached = await redis_manager.hget_cached(
+            _dashboard_cache_key(current_user.id), "insights"
+        )
+        if cached:
+            return Response(content=cached, media_type="application/json")
+
         insights = []
 
-        # Credit usage insights
         week_ago = datetime.utcnow() - timedelta(days=7)
-        weekly_usage = (
-            db.query(func.sum(func.abs(CreditTransaction.amount)))
-            .filter(
+
+        # Weekly credit usage, content variety and language counts in one query
+        weekly_usage_subq = (
+            select(func.coalesce(func.sum(func.abs(CreditTransaction.amount)), 0))
+            .where(
                 CreditTransaction.user_id == current_user.id,
                 CreditTransaction.transaction_type == TransactionType.CONSUMPTION,
                 CreditTransaction.created_at >= week_ago,
             )
-            .scalar()
-            or 0
+            .scalar_subquery()
         )
+        counts = db.execute(
+            select(
+                weekly_usage_subq.label("weekly_usage"),
+                func.count(distinct(ContentSession.content_type))
+                .filter(ContentSession.created_at >= week_ago)
+                .label("content_types"),
+                func.count(distinct(ContentSession.language)).label("languages"),
+            ).where(
+                ContentSession.user_id == current_user.id,
+                ContentSession.status == ContentStatus.COMPLETED,
+            )
+        ).one()
+
+        # Credit usage insights
+        weekly_usage = counts.weekly_usage
 
         if weekly_usage > 20:
             insights.append(
@@ -345,18 +463,7 @@ async def get_insights(
             )
 
         # Content variety insights
-        content_types = (
-            db.query(ContentSession.content_type, func.count(ContentSession.id))
-            .filter(
-                ContentSession.user_id == current_user.id,
-                ContentSession.status == ContentStatus.COMPLETED,
-                ContentSession.created_at >= week_ago,
-            )
-            .group_by(ContentSession.content_type)
-            .all()
-        )
-
-        if len(content_types) == 1:
+        if counts.content_types == 1:
             insights.append(
                 {
                     "type": "content_variety",
@@ -366,17 +473,7 @@ async def get_insights(
             )
 
         # Language insights
-        languages = (
-            db.query(ContentSession.language)
-            .filter(
-                ContentSession.user_id == current_user.id,
-                ContentSession.status == ContentStatus.COMPLETED,
-            )
-            .distinct()
-            .count()
-        )
-
-        if languages == 1 and current_user.preferred_language == "ar":
+        if counts.languages == 1 and current_user.preferred_language == "ar":
             insights.append(
                 {
                     "type": "language_learning",
@@ -385,7 +482,15 @@ async def get_insights(
                 }
             )
 
-        return {"insights": insights}
+        result = {"insights": insights}
+        await redis_manager.hset_cached(
+            _dashboard_cache_key(current_user.id),
+            "insights",
+            orjson.dumps(result),
+            DASHBOARD_CACHE_TTL,
+        )
+
+        return result
 
     except Exception as e:
         logger.error(f"Get insights failed: {e}")
@@ -4,12 +4,17 @@
 Image Proxy Router - Bypass CORS for DALL-E images
 """
 
+import hashlib
 import logging
+import time
 import httpx
 import io
-from fastapi import APIRouter, HTTPException, Query, Depends
+from collections import OrderedDict
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from fastapi.responses import StreamingResponse
-from typing import Optional
+from starlette.background import BackgroundTask
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
 import asyncio
 
 from ..auth import get_current_active_user
@@ -19,9 +24,173 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Hosts DALL-E images may be served from
+ALLOWED_IMAGE_HOSTS = frozenset(
+    {
+        "oaidalleapiprodscus.blob.core.windows.net",
+        "cdn.openai.com",
+        "files.oaiusercontent.com",
+    }
+)
+
+# Browser-like headers DALL-E storage expects on image requests
+PROXY_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "image/png,image/jpeg,image/*,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    # Images are already compressed; identity lets bytes be relayed as-is
+    "Accept-Encoding": "identity",
+    "DNT": "1",
+}
+
+# Shared client so proxied fetches reuse pooled keep-alive connections and
+# multiplex over HTTP/2 where the host supports it; closed by the
+# application lifespan on shutdown
+proxy_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    headers=PROXY_HEADERS,
+    limits=httpx.Limits(
+        max_connections=100, max_keepalive_connections=50, keepalive_expiry=60
+    ),
+)
+
+# Bytes per chunk relayed from upstream to the client
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# In-process image cache: entry lifetime, total byte budget, largest entry
+IMAGE_CACHE_TTL = 3600
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+IMAGE_CACHE_MAX_ITEM_BYTES = 4 * 1024 * 1024
+
+# A signed DALL-E URL always names the same bytes, so browsers and CDNs may
+# keep the image for as long as they like
+IMAGE_CACHE_CONTROL = (
+    "public, max-age=86400, s-maxage=2592000, "
+    "stale-while-revalidate=43200, immutable"
+)
+
+# Seconds a request waits on another request's download before fetching itself
+IMAGE_INFLIGHT_TIMEOUT = 30.0
+
+# Response headers shared by every proxied image
+IMAGE_RESPONSE_HEADERS = {
+    "Cache-Control": IMAGE_CACHE_CONTROL,
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, OPTIONS",
+    "Access-Control-Allow-Headers": "*",
+}
+
+# URL digest -> (expires_at, content_type, body), least recently used first.
+# Only touched from the event loop, so no locking is needed.
+_image_cache: "OrderedDict[bytes, Tuple[float, str, bytes]]" = OrderedDict()
+_image_cache_bytes = 0
+
+# Single-flight: URL digest -> future resolved by the request downloading it,
+# so concurrent misses for one image share a single upstream fetch
+_inflight: Dict[bytes, asyncio.Future] = {}
+
+
+def _image_cache_key(url: str) -> bytes:
+    """Fixed-size cache key for a (long, signed) image URL"""
+    return hashlib.blake2b(url.encode(), digest_size=16).digest()
+
+
+def _get_cached_image(key: bytes) -> Optional[Tuple[str, bytes]]:
+    """Get a cached (content_type, body), None if missing or expired"""
+    global _image_cache_bytes
+
+    entry = _image_cache.get(key)
+    if entry is None:
+        return None
+
+    expires_at, content_type, body = entry
+    if expires_at <= time.monotonic():
+        del _image_cache[key]
+        _image_cache_bytes -= len(body)
+        return None
+
+    _image_cache.move_to_end(key)
+    return content_type, body
+
+
+def _cache_image(key: bytes, content_type: str, body: bytes) -> None:
+    """Cache an image, evicting least recently used entries over budget"""
+    global _image_cache_bytes
+
+    old = _image_cache.pop(key, None)
+    if old is not None:
+        _image_cache_bytes -= len(old[2])
+
+    _image_cache[key] = (time.monotonic() + IMAGE_CACHE_TTL, content_type, body)
+    _image_cache_bytes += len(body)
+
+    while _image_cache_bytes > IMAGE_CACHE_MAX_BYTES:
+        _, (_, _, evicted) = _image_cache.popitem(last=False)
+        _image_cache_bytes -= len(evicted)
+
+
+def _finish_inflight(
+    cache_key: bytes, fetch: asyncio.Future, result: Optional[Tuple[str, bytes]]
+) -> None:
+    """Hand a leader's (content_type, body), or None, to waiting requests"""
+    if _inflight.get(cache_key) is fetch:
+        del _inflight[cache_key]
+    if not fetch.done():
+        fetch.set_result(result)
+
+
+async def _relay_body(
+    upstream: httpx.Response,
+    cache_key: bytes,
+    content_type: str,
+    fetch: Optional[asyncio.Future],
+):
+    """Yield upstream body chunks, caching small images once fully relayed"""
+    buffer = bytearray()
+    result = None
+    try:
+        async for chunk in upstream.aiter_raw(STREAM_CHUNK_SIZE):
+            if buffer is not None:
+                buffer += chunk
+                if len(buffer) > IMAGE_CACHE_MAX_ITEM_BYTES:
+                    buffer = None
+            yield chunk
+
+        if buffer is not None:
+            result = (content_type, bytes(buffer))
+            _cache_image(cache_key, *result)
+    finally:
+        await upstream.aclose()
+        if fetch is not None:
+            _finish_inflight(cache_key, fetch, result)
+
+
+async def _release_upstream(
+    upstream: httpx.Response, cache_key: bytes, fetch: Optional[asyncio.Future]
+) -> None:
+    """Close the upstream body and wake waiters once the response is over"""
+    # Runs even when the client disconnects before the body iterator is first
+    # advanced, in which case _relay_body's cleanup never executes
+    await upstream.aclose()
+    if fetch is not None:
+        _finish_inflight(cache_key, fetch, None)
+
+
+def _cached_image_response(
+    content_type: str, body: bytes, etag: str, source: str
+) -> Response:
+    """Serve image bytes already held in memory"""
+    return Response(
+        content=body,
+        media_type=content_type,
+        headers={**IMAGE_RESPONSE_HEADERS, "ETag": etag, "X-Proxy-Cache": source},
+    )
+
 
 @router.get("/proxy")
 async def proxy_dalle_image(
+    request: Request,
     url: str = Query(..., description="DALL-E image URL to proxy"),
     current_user: User = Depends(get_current_active_user),
 ):
@@ -30,13 +199,8 @@ async def proxy_dalle_image(
     """
     try:
         # Validate that this is a DALL-E URL for security
-        allowed_domains = [
-            "oaidalleapiprodscus.blob.core.windows.net",
-            "cdn.openai.com",
-            "files.oaiusercontent.com",
-        ]
-
-        if not any(domain in url for domain in allowed_domains):
+        parsed = urlparse(url)
+        if parsed.scheme != "https" or parsed.hostname not in ALLOWED_IMAGE_HOSTS:
             raise HTTPException(
                 status_code=400, detail="Only OpenAI/DALL-E image URLs are allowed"
             )
@@ -44,42 +208,78 @@ async def proxy_dalle_image(
         logger.info(f"🖼️ Proxying DALL-E image for user {current_user.id}")
         logger.debug(f"Image URL: {url[:100]}...")
 
-        # Download the image from DALL-E with proper headers
-        async with httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "image/png,image/jpeg,image/*,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.5",
-                "Accept-Encoding": "gzip, deflate, br",
-                "DNT": "1",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-            },
-        ) as client:
-            response = await client.get(url, follow_redirects=True)
-            response.raise_for_status()
-
-            # Get content type
-            content_type = response.headers.get("content-type", "image/png")
-            content_length = len(response.content)
-
-            logger.info(
-                f"✅ Successfully proxied image: {content_type}, {content_length} bytes"
+        # The URL digest doubles as a strong ETag; a matching conditional GET
+        # is answered without touching the cache or upstream
+        cache_key = _image_cache_key(url)
+        etag = f'"{cache_key.hex()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(
+                status_code=304,
+                headers={"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL},
             )
 
-            # Return the image with CORS headers
-            return StreamingResponse(
-                io.BytesIO(response.content),
-                media_type=content_type,
-                headers={
-                    "Cache-Control": "public, max-age=7200",  # Cache for 2 hours
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                    "Access-Control-Allow-Headers": "*",
-                    "Content-Length": str(content_length),
-                },
+        cached = _get_cached_image(cache_key)
+        if cached:
+            return _cached_image_response(*cached, etag, "HIT")
+
+        # Join a download already in progress; if it fails, runs too long or
+        # the image is too large to share, fetch it ourselves
+        fetch = _inflight.get(cache_key)
+        if fetch is not None:
+            try:
+                shared = await asyncio.wait_for(
+                    asyncio.shield(fetch), timeout=IMAGE_INFLIGHT_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                _finish_inflight(cache_key, fetch, None)
+                shared = None
+            if shared:
+                return _cached_image_response(*shared, etag, "SHARED")
+            fetch = None
+        else:
+            fetch = asyncio.get_running_loop().create_future()
+            _inflight[cache_key] = fetch
+
+        # Stream the image from DALL-E rather than buffering it in memory
+        try:
+            upstream = await proxy_client.send(
+                proxy_client.build_request("GET", url),
+                stream=True,
+                follow_redirects=True,
             )
+            try:
+                upstream.raise_for_status()
+            except httpx.HTTPStatusError:
+                await upstream.aclose()
+                raise
+        except BaseException:
+            if fetch is not None:
+                _finish_inflight(cache_key, fetch, None)
+            raise
+
+        # Get content type
+        content_type = upstream.headers.get("content-type", "image/png")
+        content_length = upstream.headers.get("content-length")
+
+        logger.info(
+            f"✅ Proxying image: {content_type}, {content_length or 'unknown'} bytes"
+        )
+        logger.debug(f"Upstream protocol: {upstream.http_version}")
+
+        # Return the image with CORS headers
+        headers = {**IMAGE_RESPONSE_HEADERS, "ETag": etag, "X-Proxy-Cache": "MISS"}
+        if content_length:
+            headers["Content-Length"] = content_length
+
+        return StreamingResponse(
+            _relay_body(upstream, cache_key, content_type, fetch),
+            media_type=content_type,
+            headers=headers,
+            background=BackgroundTask(_release_upstream, upstream, cache_key, fetch),
+        )
+
+    except HTTPException:
+        raise
 
     except httpx.HTTPStatusError as e:
         logger.error(f"❌ HTTP error proxying image: {e.response.status_code}")
@@ -3,10 +3,12 @@ Kiddos - System Router
 Health checks, webhooks, and system endpoints
 """
 
+import asyncio
 import logging
 import time
 import stripe
 from datetime import datetime
+from typing import Awaitable, Callable, Dict, Tuple
 from fastapi import APIRouter, HTTPException, Request, Depends
 from sqlalchemy.orm import Session
 
@@ -25,25 +27,54 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 # Create router
 router = APIRouter()
 
+# Seconds a health sub-check result is reused before probing again
+HEALTH_CHECK_TTL = 5.0
+
+# Sub-check name -> (checked_at, result); the per-name lock lets concurrent
+# probes share one check instead of each hitting the dependency
+_health_cache: Dict[str, Tuple[float, dict]] = {}
+_health_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def _cached_health(name: str, check: Callable[[], Awaitable[dict]]) -> dict:
+    """Run a health sub-check at most once per HEALTH_CHECK_TTL seconds"""
+    entry = _health_cache.get(name)
+    if entry and time.monotonic() - entry[0] < HEALTH_CHECK_TTL:
+        return entry[1]
+
+    async with _health_locks.setdefault(name, asyncio.Lock()):
+        entry = _health_cache.get(name)
+        if entry and time.monotonic() - entry[0] < HEALTH_CHECK_TTL:
+            return entry[1]
+
+        result = await check()
+        _health_cache[name] = (time.monotonic(), result)
+        return result
+
 
 @router.get("/health", response_model=HealthCheck)
 async def health_check():
     """System health check"""
     try:
-        # Check database
-        db_health = await health_check_database()
-
-        # Check Redis
-        redis_health = await health_check_redis()
-
-        # Check Claude API
-        claude_health = await claude_service.get_service_health()
+        # Check database, Redis and Claude API concurrently
+        checks = {
+            "database": health_check_database,
+            "redis": health_check_redis,
+            "claude_api": claude_service.get_service_health,
+        }
+        results = await asyncio.gather(
+            *(_cached_health(name, check) for name, check in checks.items()),
+            return_exceptions=True,
+        )
 
         # Determine overall status
         services = {
-            "database": db_health,
-            "redis": redis_health,
-            "claude_api": claude_health,
+            name: (
+                {"status": "unhealthy", "details": repr(result)}
+                if isinstance(result, Exception)
+                else result
+            )
+            for name, result in zip(checks, results)
         }
 
         overall_status = "healthy"
@@ -5,6 +5,7 @@ Profile management, settings, privacy
 
 import logging
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.orm import Session
 
@@ -19,8 +20,9 @@ from ..schemas import (
 )
 from ..auth import get_current_active_user, field_encryption
 from ..rate_limiter import rate_limit, get_user_rate_limits
-from ..models import User, Child, DataDeletionRequest
+from ..models import User, DataDeletionRequest
 from ..worker import backup_user_data, delete_user_data
+from .children import invalidate_children_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -29,20 +31,34 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _user_profile(
+    user: User, first_name: Optional[str], last_name: Optional[str]
+) -> UserProfile:
+    """Build a UserProfile from a user and its already decrypted names"""
+    return UserProfile(
+        id=str(user.id),
+        email=field_encryption.decrypt(user.email_encrypted),
+        first_name=first_name,
+        last_name=last_name,
+        tier=user.tier,
+        credits=user.credits,
+        preferred_language=user.preferred_language,
+        timezone=user.timezone,
+        is_verified=user.is_verified,
+        created_at=user.created_at,
+        referral_code=user.referral_code,
+        # Kept current by the database trigger on children
+        children_count=user.active_children_count,
+    )
+
+
 @router.get("/profile", response_model=UserProfile)
 async def get_user_profile(
     current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)
 ):
     """Get user profile"""
     try:
-        children_count = (
-            db.query(Child)
-            .filter(Child.user_id == current_user.id, Child.is_active == True)
-            .count()
-        )
-
         # Decrypt personal information
-        email = field_encryption.decrypt(current_user.email_encrypted)
         first_name = None
         last_name = None
 
@@ -51,20 +67,7 @@ async def get_user_profile(
         if current_user.last_name_encrypted:
             last_name = field_encryption.decrypt(current_user.last_name_encrypted)
 
-        return UserProfile(
-            id=str(current_user.id),
-            email=email,
-            first_name=first_name,
-            last_name=last_name,
-            tier=current_user.tier,
-            credits=current_user.credits,
-            preferred_language=current_user.preferred_language,
-            timezone=current_user.timezone,
-            is_verified=current_user.is_verified,
-            created_at=current_user.created_at,
-            referral_code=current_user.referral_code,
-            children_count=children_count,
-        )
+        return _user_profile(current_user, first_name, last_name)
 
     except Exception as e:
         logger.error(f"Get profile failed: {e}")
@@ -82,15 +85,18 @@ async def update_user_profile(
 ):
     """Update user profile"""
     try:
-        # Update fields
-        if update_data.first_name is not None:
-            current_user.first_name_encrypted = field_encryption.encrypt(
-                update_data.first_name
-            )
-        if update_data.last_name is not None:
-            current_user.last_name_encrypted = field_encryption.encrypt(
-                update_data.last_name
-            )
+        # Update fields, keeping the plaintext of any name that changed
+        first_name = update_data.first_name
+        last_name = update_data.last_name
+
+        if first_name is not None:
+            current_user.first_name_encrypted = field_encryption.encrypt(first_name)
+        elif current_user.first_name_encrypted:
+            first_name = field_encryption.decrypt(current_user.first_name_encrypted)
+        if last_name is not None:
+            current_user.last_name_encrypted = field_encryption.encrypt(last_name)
+        elif current_user.last_name_encrypted:
+            last_name = field_encryption.decrypt(current_user.last_name_encrypted)
         if update_data.preferred_language:
             current_user.preferred_language = update_data.preferred_language
         if update_data.timezone:
@@ -99,10 +105,14 @@ async def update_user_profile(
             current_user.marketing_consent = update_data.marketing_consent
 
         current_user.updated_at = datetime.utcnow()
+
+        # Build the response before commit expires the user's attributes,
+        # so returning it needs no reload
+        profile = _user_profile(current_user, first_name, last_name)
         db.commit()
+        await invalidate_children_cache(current_user.id)
 
-        # Return updated profile
-        return await get_user_profile(current_user, db)
+        return profile
 
     except Exception as e:
         logger.error(f"Profile update failed: {e}")
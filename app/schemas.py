@@ -36,11 +36,24 @@ class UserRegister(BaseModel):
         """Validate password strength"""
         if len(v) < 8:
             raise ValueError("Password must be at least 8 characters")
-        if not any(c.isupper() for c in v):
+
+        # One pass collecting character classes: 1 upper, 2 lower, 4 digit
+        flags = 0
+        for c in v:
+            if c.isupper():
+                flags |= 1
+            elif c.islower():
+                flags |= 2
+            elif c.isdigit():
+                flags |= 4
+            if flags == 7:
+                break
+
+        if not flags & 1:
             raise ValueError("Password must contain at least one uppercase letter")
-        if not any(c.islower() for c in v):
+        if not flags & 2:
             raise ValueError("Password must contain at least one lowercase letter")
-        if not any(c.isdigit() for c in v):
+        if not flags & 4:
             raise ValueError("Password must contain at least one number")
         return v
 
@@ -48,7 +61,9 @@ class UserRegister(BaseModel):
     @classmethod
     def validate_names(cls, v):
         """Validate names contain only letters and spaces"""
-        if v and not all(c.isalpha() or c.isspace() for c in v):
+        # str.split and isalpha scan in C; an all-whitespace name is allowed
+        letters = "".join(v.split()) if v else ""
+        if letters and not letters.isalpha():
             raise ValueError("Names can only contain letters and spaces")
         return v
 
@@ -137,6 +152,31 @@ class UserLimits(BaseModel):
 # Child Management Schemas
 # ===============================
 
+# Allowed child profile values, in the order error messages list them
+LEARNING_LEVELS = ("beginner", "intermediate", "advanced")
+INTERESTS = (
+    "animals",
+    "space",
+    "math",
+    "science",
+    "art",
+    "music",
+    "sports",
+    "cooking",
+    "nature",
+    "stories",
+    "puzzles",
+    "history",
+)
+LANGUAGES = ("ar", "en", "fr", "de")
+CONTENT_DIFFICULTIES = ("easy", "age_appropriate", "challenging")
+
+# Membership sets built once rather than per validation call
+VALID_LEARNING_LEVELS = frozenset(LEARNING_LEVELS)
+VALID_INTERESTS = frozenset(INTERESTS)
+VALID_LANGUAGES = frozenset(LANGUAGES)
+VALID_CONTENT_DIFFICULTIES = frozenset(CONTENT_DIFFICULTIES)
+
 
 class ChildCreate(BaseModel):
     """Create child profile request - FIXED to handle empty strings"""
@@ -185,10 +225,9 @@ class ChildCreate(BaseModel):
     @classmethod
     def validate_learning_level(cls, v):
         """Validate learning level"""
-        valid_levels = ["beginner", "intermediate", "advanced"]
-        if v not in valid_levels:
+        if v not in VALID_LEARNING_LEVELS:
             raise ValueError(
-                f"Learning level must be one of: {', '.join(valid_levels)}"
+                f"Learning level must be one of: {', '.join(LEARNING_LEVELS)}"
             )
         return v
 
@@ -199,30 +238,15 @@ class ChildCreate(BaseModel):
         if not isinstance(v, list):
             raise ValueError("Interests must be a list")
 
-        valid_interests = [
-            "animals",
-            "space",
-            "math",
-            "science",
-            "art",
-            "music",
-            "sports",
-            "cooking",
-            "nature",
-            "stories",
-            "puzzles",
-            "history",
-        ]
-
         if len(v) > 10:
             raise ValueError("Too many interests (max 10)")
 
         for interest in v:
             if not isinstance(interest, str):
                 raise ValueError("All interests must be strings")
-            if interest not in valid_interests:
+            if interest not in VALID_INTERESTS:
                 raise ValueError(
-                    f"Invalid interest: {interest}. Valid interests: {', '.join(valid_interests)}"
+                    f"Invalid interest: {interest}. Valid interests: {', '.join(INTERESTS)}"
                 )
 
         return v
@@ -236,11 +260,8 @@ class ChildCreate(BaseModel):
             if not v.strip():
                 return None
 
-            valid_languages = ["ar", "en", "fr", "de"]
-            if v not in valid_languages:
-                raise ValueError(
-                    f"Language must be one of: {', '.join(valid_languages)}"
-                )
+            if v not in VALID_LANGUAGES:
+                raise ValueError(f"Language must be one of: {', '.join(LANGUAGES)}")
             return v
         return v
 
@@ -248,10 +269,9 @@ class ChildCreate(BaseModel):
     @classmethod
     def validate_content_difficulty(cls, v):
         """Validate content difficulty"""
-        valid_difficulties = ["easy", "age_appropriate", "challenging"]
-        if v not in valid_difficulties:
+        if v not in VALID_CONTENT_DIFFICULTIES:
             raise ValueError(
-                f"Content difficulty must be one of: {', '.join(valid_difficulties)}"
+                f"Content difficulty must be one of: {', '.join(CONTENT_DIFFICULTIES)}"
             )
         return v
 
@@ -300,10 +320,9 @@ class ChildUpdate(BaseModel):
     def validate_learning_level(cls, v):
         """Validate learning level"""
         if v is not None:
-            valid_levels = ["beginner", "intermediate", "advanced"]
-            if v not in valid_levels:
+            if v not in VALID_LEARNING_LEVELS:
                 raise ValueError(
-                    f"Learning level must be one of: {', '.join(valid_levels)}"
+                    f"Learning level must be one of: {', '.join(LEARNING_LEVELS)}"
                 )
         return v
 
@@ -315,28 +334,13 @@ class ChildUpdate(BaseModel):
             if not isinstance(v, list):
                 raise ValueError("Interests must be a list")
 
-            valid_interests = [
-                "animals",
-                "space",
-                "math",
-                "science",
-                "art",
-                "music",
-                "sports",
-                "cooking",
-                "nature",
-                "stories",
-                "puzzles",
-                "history",
-            ]
-
             if len(v) > 10:
                 raise ValueError("Too many interests (max 10)")
 
             for interest in v:
                 if not isinstance(interest, str):
                     raise ValueError("All interests must be strings")
-                if interest not in valid_interests:
+                if interest not in VALID_INTERESTS:
                     raise ValueError(f"Invalid interest: {interest}")
 
         return v
@@ -349,11 +353,8 @@ class ChildUpdate(BaseModel):
             if not v.strip():
                 return None
 
-            valid_languages = ["ar", "en", "fr", "de"]
-            if v not in valid_languages:
-                raise ValueError(
-                    f"Language must be one of: {', '.join(valid_languages)}"
-                )
+            if v not in VALID_LANGUAGES:
+                raise ValueError(f"Language must be one of: {', '.join(LANGUAGES)}")
             return v
         return v
 
@@ -362,10 +363,9 @@ class ChildUpdate(BaseModel):
     def validate_content_difficulty(cls, v):
         """Validate content difficulty"""
         if v is not None:
-            valid_difficulties = ["easy", "age_appropriate", "challenging"]
-            if v not in valid_difficulties:
+            if v not in VALID_CONTENT_DIFFICULTIES:
                 raise ValueError(
-                    f"Content difficulty must be one of: {', '.join(valid_difficulties)}"
+                    f"Content difficulty must be one of: {', '.join(CONTENT_DIFFICULTIES)}"
                 )
         return v
 
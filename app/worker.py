@@ -13,10 +13,10 @@ import time
 from typing import Dict, Any, Optional
 from celery import Celery
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 
 from app.config import settings
-from app.database import SessionLocal
+from app.database import SessionLocal, redis_client
 from app.models import (
     ContentSession,
     ContentStatus,
@@ -40,6 +40,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Text-only and image generations run on separate queues so quick text jobs
+# never wait behind 30-60s image jobs
+CONTENT_TEXT_QUEUE = "content_text"
+CONTENT_IMAGES_QUEUE = "content_images"
+
+# Statuses a generation task can finish in; only these are published
+FINAL_CONTENT_STATUSES = frozenset(
+    {ContentStatus.COMPLETED, ContentStatus.FAILED, ContentStatus.REJECTED}
+)
+
 celery_app = Celery(
     "kiddos",
     broker=settings.REDIS_URL,
@@ -61,14 +71,20 @@ celery_app.conf.update(
     task_acks_late=True,
     worker_max_tasks_per_child=50,
     task_routes={
-        "app.worker.generate_content_task": {"queue": "content_generation"},
         "app.worker.cleanup_expired_sessions": {"queue": "maintenance"},
+        "app.worker.revoke_session_in_db": {"queue": "maintenance"},
         "app.worker.cleanup_expired_content": {"queue": "maintenance"},
+        "app.worker.refresh_admin_daily_stats": {"queue": "maintenance"},
     },
     task_default_queue="celery",
     task_create_missing_queues=True,
     task_reject_on_worker_lost=True,
     task_ignore_result=False,
+    # Redis priorities: 0 is highest
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+    },
 )
 
 
@@ -83,6 +99,11 @@ celery_app.conf.beat_schedule = {
         "schedule": 1800.0,  # Every 30 minutes
         "options": {"queue": "maintenance"},
     },
+    "refresh-admin-daily-stats": {
+        "task": "app.worker.refresh_admin_daily_stats",
+        "schedule": 60.0,  # Every minute
+        "options": {"queue": "maintenance"},
+    },
 }
 
 
@@ -95,6 +116,31 @@ def get_db_session():
         raise
 
 
+def _has_final_status(session_id: str, session: ContentSession) -> bool:
+    """Whether the session ended in a final status (False if unreadable)"""
+    # After a failed commit the expired row is reloaded here, so this can hit
+    # the database; never let that escape a task's finally block
+    try:
+        return session.status in FINAL_CONTENT_STATUSES
+    except Exception as e:
+        logger.error(f"Failed to read status for session {session_id}: {e}")
+        return False
+
+
+def publish_session_status(session_id: str, session: ContentSession):
+    """Notify /content/events listeners of a session's final status"""
+    try:
+        status_value = session.status.value.lower()
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.publish(f"session:{session_id}", json.dumps({"status": status_value}))
+        # Final statuses change the owner's dashboard figures and the
+        # children's cached profiles
+        pipe.delete(f"dashboard:{session.user_id}", f"children:{session.user_id}")
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to publish status for session {session_id}: {e}")
+
+
 def is_educational_content_safe(
     content_dict: dict, topic: str, age_group: int
 ) -> tuple[bool, str]:
@@ -440,6 +486,25 @@ def generate_content_task(self, session_id: str):
             f"✅ Found content session: {session.topic} for age {session.age_group}"
         )
 
+        # Topic safety check runs here instead of in the /generate request
+        from .claude_service import check_topic_safety
+
+        is_safe, safety_reason = asyncio.run(
+            check_topic_safety(session.topic, session.age_group)
+        )
+        if not is_safe:
+            logger.info(f"🛡️ Topic rejected for session {session_id}: {safety_reason}")
+            session.status = ContentStatus.REJECTED
+            session.safety_approved = False
+            session.moderation_notes = f"Topic not appropriate: {safety_reason}"
+            session.generation_completed_at = datetime.utcnow()
+            db.commit()
+            return {
+                "status": "rejected",
+                "session_id": session_id,
+                "reason": safety_reason,
+            }
+
         # FIXED: Check if session has include_images field
         should_generate_images = getattr(session, "include_images", False)
         logger.info(f"🎨 Images requested: {should_generate_images}")
@@ -580,7 +645,7 @@ def generate_content_task(self, session_id: str):
             # FIXED: Proper JSON serialization and encryption
             content_json = json.dumps(content_result, ensure_ascii=False, default=str)
             content_bytes = content_json.encode("utf-8")
-            encrypted_content = field_encryption.encrypt(content_bytes)
+            encrypted_content = field_encryption.encrypt(content_bytes, compress=True)
 
             # FIXED: Calculate generation time and create metadata
             generation_time = time.time() - start_time
@@ -708,6 +773,9 @@ def generate_content_task(self, session_id: str):
         return {"status": "error", "session_id": session_id, "message": str(exc)}
 
     finally:
+        if session is not None and _has_final_status(session_id, session):
+            publish_session_status(session_id, session)
+
         # FIXED: Always close database session
         if db:
             try:
@@ -717,6 +785,15 @@ def generate_content_task(self, session_id: str):
                 logger.error(f"Error closing database: {close_error}")
 
 
+def enqueue_content_generation(session_id: str, include_images: bool):
+    """Queue content generation on the text or image queue"""
+    return generate_content_task.apply_async(
+        args=[session_id],
+        queue=CONTENT_IMAGES_QUEUE if include_images else CONTENT_TEXT_QUEUE,
+        priority=9 if include_images else 5,
+    )
+
+
 @celery_app.task(name="app.worker.cleanup_expired_sessions")
 def cleanup_expired_sessions():
     """Clean up expired user sessions"""
@@ -741,6 +818,26 @@ def cleanup_expired_sessions():
         db.close()
 
 
+@celery_app.task(name="app.worker.revoke_session_in_db")
+def revoke_session_in_db(token: str):
+    """Mark a logged-out session inactive (Redis already rejects the token)"""
+    db = get_db_session()
+    try:
+        count = (
+            db.query(UserSession)
+            .filter(UserSession.token == token, UserSession.is_active == True)
+            .update({"is_active": False}, synchronize_session=False)
+        )
+        db.commit()
+        return {"revoked_sessions": count}
+    except Exception as e:
+        logger.error(f"❌ Session revocation failed: {e}")
+        db.rollback()
+        return {"error": str(e)}
+    finally:
+        db.close()
+
+
 @celery_app.task(name="app.worker.cleanup_expired_content")
 def cleanup_expired_content():
     """Clean up expired content sessions"""
@@ -772,6 +869,22 @@ def cleanup_expired_content():
         db.close()
 
 
+@celery_app.task(name="app.worker.refresh_admin_daily_stats")
+def refresh_admin_daily_stats():
+    """Recompute the admin dashboard rollup without blocking its readers"""
+    db = get_db_session()
+    try:
+        db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY admin_daily_stats"))
+        db.commit()
+        return {"status": "refreshed"}
+    except Exception as e:
+        logger.error(f"❌ Admin stats refresh failed: {e}")
+        db.rollback()
+        return {"error": str(e)}
+    finally:
+        db.close()
+
+
 @celery_app.task(name="app.worker.test_task")
 def test_task(message: str = "Hello from Celery!"):
     """Simple test task to verify Celery is working"""
@@ -0,0 +1,73 @@
+# Script to re-encrypt legacy Fernet content with AES-GCM
+# Run this inside your API container: docker-compose exec api python reencrypt_content.py
+
+from sqlalchemy import select, update
+
+from app.database import SessionLocal
+from app.models import ContentSession
+from app.auth import field_encryption
+
+BATCH_SIZE = 200
+
+
+def reencrypt_generated_content(batch_size: int = BATCH_SIZE) -> int:
+    """Re-encrypt every Fernet-encrypted generated_content row, batch by batch"""
+
+    db = SessionLocal()
+    converted = 0
+    last_id = None
+    try:
+        while True:
+            stmt = (
+                select(ContentSession.id, ContentSession.generated_content)
+                .where(ContentSession.generated_content.isnot(None))
+                .order_by(ContentSession.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                stmt = stmt.where(ContentSession.id > last_id)
+
+            rows = db.execute(stmt).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            for row in rows:
+                if not field_encryption.is_legacy(row.generated_content):
+                    continue
+
+                plaintext = field_encryption.decrypt(row.generated_content)
+                if not plaintext:
+                    print(f"❌ Could not decrypt session {row.id}, skipping")
+                    continue
+
+                db.execute(
+                    update(ContentSession)
+                    .where(ContentSession.id == row.id)
+                    .values(
+                        generated_content=field_encryption.encrypt(
+                            plaintext, compress=True
+                        )
+                    )
+                )
+                converted += 1
+
+            db.commit()
+            print(f"Processed up to {last_id} ({converted} re-encrypted)")
+
+        return converted
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Re-encryption failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("RE-ENCRYPTING GENERATED CONTENT WITH AES-GCM")
+    print("=" * 50)
+
+    total = reencrypt_generated_content()
+    print(f"\n✅ Re-encrypted {total} content sessions")